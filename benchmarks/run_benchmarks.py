@@ -0,0 +1,384 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tempfile
+import numpy as np
+import torch
+from termcolor import cprint
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bitboard import BOARDS, LEGAL_MASK, WINNER, reachable_positions
+from core.game_environment import TicTacToeGame, BatchTicTacToeGame, mover_reward
+from core.gym_env import SyncVectorEnv
+from core.neural_network import TicTacToeAI
+from core.numpy_inference import NumpyTicTacToeAI, export_numpy_weights
+
+HISTORY_PATH = "benchmark_history.json"
+
+# name -> (function, unit, higher_is_better); filled by @benchmark
+BENCHMARKS = {}
+
+
+def benchmark(unit, higher_is_better=True):
+    def decorator(func):
+        BENCHMARKS[func.__name__] = (func, unit, higher_is_better)
+        return func
+    return decorator
+
+
+def measure_rate(func, units_per_call, min_time, repeats):
+    """Best throughput (units/sec) over `repeats` runs of at least min_time seconds"""
+    func()  # Warm-up
+    best = 0.0
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, calls * units_per_call / elapsed)
+    return best
+
+
+def measure_time_ms(func, min_time, repeats):
+    """Fastest single call in milliseconds"""
+    func()
+    best = float('inf')
+    for _ in range(repeats):
+        deadline = time.perf_counter() + min_time
+        while True:
+            start = time.perf_counter()
+            func()
+            best = min(best, (time.perf_counter() - start) * 1000)
+            if time.perf_counter() >= deadline:
+                break
+    return best
+
+
+def _playable_boards(count):
+    positions = reachable_positions()
+    positions = positions[(WINNER[positions] == 0) & (LEGAL_MASK[positions] != 0)]
+    return BOARDS[np.random.choice(positions, size=count)]
+
+
+def _greedy_ai():
+    ai = TicTacToeAI()
+    ai.epsilon = 0.0
+    return ai
+
+
+def _filled_ai():
+    """AI with a full replay buffer from random self-play"""
+    ai = TicTacToeAI()
+    while len(ai.memory) < ai.memory.capacity:
+        game = TicTacToeGame()
+        state = game.reset()
+        while not game.done:
+            action = random.choice(game._available_actions())
+            next_state, _, done = game.make_move(action)
+            ai.remember(state, action, mover_reward(game), next_state, done)
+            state = next_state
+    return ai
+
+
+@benchmark("moves/sec")
+def game_moves(min_time, repeats):
+    games = [np.random.permutation(9).tolist() for _ in range(256)]
+    game = TicTacToeGame()
+
+    def run():
+        moves = 0
+        for order in games:
+            game.reset()
+            for action in order:
+                moves += 1
+                if game.make_move(action, copy=False)[2]:
+                    break
+        return moves
+
+    moves_per_call = run()
+    return measure_rate(run, moves_per_call, min_time, repeats)
+
+
+@benchmark("moves/sec")
+def gomoku_moves(min_time, repeats):
+    """15x15 board, 5 in a row: move cost should stay close to the 3x3 game"""
+    games = [np.random.permutation(225).tolist() for _ in range(16)]
+    game = TicTacToeGame(15, 15, 5)
+
+    def run():
+        moves = 0
+        for order in games:
+            game.reset()
+            for action in order:
+                moves += 1
+                if game.make_move(action, copy=False)[2]:
+                    break
+        return moves
+
+    moves_per_call = run()
+    return measure_rate(run, moves_per_call, min_time, repeats)
+
+
+@benchmark("moves/sec")
+def batch_env_moves(min_time, repeats):
+    env = BatchTicTacToeGame(1024)
+
+    def run():
+        legal = env.get_legal_masks()
+        actions = (np.random.random(legal.shape) * legal).argmax(axis=1)
+        env.make_moves(actions)
+
+    return measure_rate(run, env.num_games, min_time, repeats)
+
+
+@benchmark("steps/sec")
+def vector_env_steps(min_time, repeats):
+    """Gymnasium-style SyncVectorEnv with auto-reset, random legal actions"""
+    env = SyncVectorEnv(4096, copy=False)
+    _, infos = env.reset(seed=0)
+    masks = infos['action_mask']  # Updated in place by every step with copy=False
+
+    def run():
+        env.step((np.random.random(masks.shape) * masks).argmax(axis=1))
+
+    return measure_rate(run, env.num_envs, min_time, repeats)
+
+
+@benchmark("positions/sec")
+def choose_action_single(min_time, repeats):
+    ai = _greedy_ai()
+    boards = [board.tolist() for board in _playable_boards(256)]
+    actions = [[i for i in range(9) if board[i] == 0] for board in boards]
+
+    def run():
+        for board, available in zip(boards, actions):
+            ai.choose_action(board, available)
+
+    return measure_rate(run, len(boards), min_time, repeats)
+
+
+@benchmark("positions/sec")
+def choose_actions_batched(min_time, repeats):
+    ai = _greedy_ai()
+    boards = _playable_boards(1024)
+    legal = boards == 0
+    return measure_rate(lambda: ai.choose_actions(boards, legal), len(boards), min_time, repeats)
+
+
+@benchmark("positions/sec")
+def choose_actions_batched_bfloat16(min_time, repeats):
+    ai = _greedy_ai()
+    ai.inference_dtype = 'bfloat16'
+    boards = _playable_boards(1024)
+    legal = boards == 0
+    return measure_rate(lambda: ai.choose_actions(boards, legal), len(boards), min_time, repeats)
+
+
+@benchmark("positions/sec")
+def choose_actions_batched_int8(min_time, repeats):
+    ai = _greedy_ai()
+    ai.inference_dtype = 'int8'
+    boards = _playable_boards(1024)
+    legal = boards == 0
+    return measure_rate(lambda: ai.choose_actions(boards, legal), len(boards), min_time, repeats)
+
+
+@benchmark("positions/sec")
+def numpy_choose_actions_batched(min_time, repeats):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "weights.npz")
+        export_numpy_weights(_greedy_ai(), path)
+        ai = NumpyTicTacToeAI(path)
+    boards = _playable_boards(1024)
+    legal = boards == 0
+    return measure_rate(lambda: ai.choose_actions(boards, legal, epsilon=0.0), len(boards),
+                        min_time, repeats)
+
+
+@benchmark("steps/sec")
+def replay_steps(min_time, repeats):
+    ai = _filled_ai()
+    return measure_rate(lambda: ai.replay(batch_size=16), 1, min_time, repeats)
+
+
+@benchmark("steps/sec")
+def replay_steps_batch64(min_time, repeats):
+    ai = _filled_ai()
+    return measure_rate(lambda: ai.replay(batch_size=64), 1, min_time, repeats)
+
+
+@benchmark("episodes/sec")
+def self_play_episodes(min_time, repeats):
+    """One train_ai episode: acting, remember, replay every other move"""
+    ai = _filled_ai()
+    ai.epsilon, ai.epsilon_decay = 0.5, 1.0  # Fixed mix of greedy and random moves
+
+    def run():
+        game = TicTacToeGame()
+        state = game.reset()
+        steps = 0
+        while not game.done:
+            action = ai.choose_action(state, game._available_actions())
+            next_state, _, done = game.make_move(action)
+            ai.remember(state, action, mover_reward(game), next_state, done)
+            state = next_state
+            if steps % 2 == 0:
+                ai.replay(batch_size=16)
+            steps += 1
+
+    return measure_rate(run, 1, min_time, repeats)
+
+
+@benchmark("ms", higher_is_better=False)
+def checkpoint_save(min_time, repeats):
+    ai = _filled_ai()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "checkpoint.pth")
+        return measure_time_ms(lambda: ai.save_model(path), min_time, repeats)
+
+
+@benchmark("ms", higher_is_better=False)
+def checkpoint_load(min_time, repeats):
+    ai = _filled_ai()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "checkpoint.pth")
+        ai.save_model(path)
+        return measure_time_ms(lambda: TicTacToeAI().load_model(path), min_time, repeats)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(names=None, min_time=1.0, repeats=3, threads=1, seed=0):
+    """Run the selected benchmarks and return a history record"""
+    torch.set_num_threads(threads)
+    results = {}
+    for name in names or BENCHMARKS:
+        func, unit, higher_is_better = BENCHMARKS[name]
+        random.seed(seed)
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+        value = func(min_time, repeats)
+        results[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+        cprint(f"{name:<32}{value:>16,.2f} {unit}", "yellow")
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'threads': threads,
+        'results': results
+    }
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(history, path=HISTORY_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def compare_runs(baseline, current, threshold=0.1):
+    """Relative change per benchmark; a slowdown beyond threshold is a regression"""
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        old = baseline['results'][name]['value']
+        new = result['value']
+        change = (new - old) / old if old else 0.0
+        slowdown = -change if result['higher_is_better'] else change
+        rows.append({'name': name, 'old': old, 'new': new, 'unit': result['unit'],
+                     'change': change, 'regression': slowdown > threshold})
+    return rows
+
+
+def print_comparison(rows, baseline, current, threshold):
+    cprint(f"=== {baseline.get('commit') or baseline['timestamp']} -> "
+           f"{current.get('commit') or current['timestamp']} (threshold {threshold:.0%}) ===",
+           "cyan", attrs=['bold'])
+    for row in rows:
+        color = "red" if row['regression'] else "green"
+        flag = "  REGRESSION" if row['regression'] else ""
+        cprint(f"{row['name']:<32}{row['old']:>14,.2f}{row['new']:>14,.2f} {row['unit']:<14}"
+               f"{row['change']:>+8.1%}{flag}", color)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmarks with regression tracking")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSON file with past runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run benchmarks and append them to the history")
+    run_parser.add_argument("names", nargs="*", help=f"subset of: {', '.join(BENCHMARKS)}")
+    run_parser.add_argument("--min-time", type=float, default=1.0, help="seconds per repeat")
+    run_parser.add_argument("--repeats", type=int, default=3)
+    run_parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    run_parser.add_argument("--no-save", action="store_true")
+    run_parser.add_argument("--threshold", type=float, default=0.1,
+                            help="compare against the previous run and fail on slowdowns beyond this")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two runs from the history")
+    compare_parser.add_argument("--baseline", type=int, default=-2, help="history index of the baseline run")
+    compare_parser.add_argument("--current", type=int, default=-1, help="history index of the new run")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    subparsers.add_parser("list", help="list the available benchmarks")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name, (func, unit, _) in BENCHMARKS.items():
+            print(f"{name:<32}{unit}")
+        return 0
+
+    history = load_history(args.history)
+    if args.command == "run":
+        unknown = [name for name in args.names if name not in BENCHMARKS]
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+        record = run_benchmarks(args.names, args.min_time, args.repeats, args.threads)
+        baseline = history[-1] if history else None
+        if not args.no_save:
+            history.append(record)
+            save_history(history, args.history)
+        current = record
+    else:
+        if len(history) < 2:
+            cprint("Need at least two runs in the history to compare", "red")
+            return 1
+        baseline = history[args.baseline]
+        current = history[args.current]
+
+    if baseline is None:
+        return 0
+    rows = compare_runs(baseline, current, args.threshold)
+    print_comparison(rows, baseline, current, args.threshold)
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import numpy as np
+
+# A board is encoded as a base-3 index: cell i contributes digit * 3**i,
+# with digit 0 for empty, 1 for X and 2 for O. All 3**9 indices are valid
+# keys into the lookup tables below, even for boards that cannot occur.
+NUM_POSITIONS = 3 ** 9
+POWERS = 3 ** np.arange(9, dtype=np.int64)
+CELL_DIGIT = {0: 0, 1: 1, -1: 2}
+
+WIN_LINES = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),
+    (0, 4, 8), (2, 4, 6)
+)
+
+# The 8 board symmetries as cell permutations: transformed[i] = board[perm[i]]
+SYMMETRIES = np.array([
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],  # identity
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],  # rotate 90
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],  # rotate 180
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],  # rotate 270
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],  # mirror left-right
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],  # mirror top-bottom
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],  # transpose
+    [8, 5, 2, 7, 4, 1, 6, 3, 0],  # anti-transpose
+], dtype=np.int64)
+# INVERSE_SYMMETRIES[s][cell] is where `cell` ends up after applying symmetry s
+INVERSE_SYMMETRIES = np.argsort(SYMMETRIES, axis=1)
+
+
+def _build_tables():
+    indices = np.arange(NUM_POSITIONS, dtype=np.int64)
+    digits = (indices[:, None] // POWERS) % 3
+    cells = np.where(digits == 2, -1, digits).astype(np.int8)
+
+    winner = np.zeros(NUM_POSITIONS, dtype=np.int8)
+    for player in (1, -1):
+        owned = cells == player
+        for line in WIN_LINES:
+            winner[owned[:, list(line)].all(axis=1)] = player
+
+    legal_mask = ((cells == 0) * (1 << np.arange(9))).sum(axis=1).astype(np.int16)
+
+    transformed = (digits[:, SYMMETRIES] * POWERS).sum(axis=2)  # (positions, 8)
+    canonical_symmetry = transformed.argmin(axis=1).astype(np.int8)
+    canonical = transformed[indices, canonical_symmetry].astype(np.int32)
+    return cells, winner, legal_mask, canonical, canonical_symmetry
+
+
+# BOARDS[p]: board of position p as int8 cells (1, -1, 0)
+# WINNER[p]: 1 / -1 if that player owns a line, else 0
+# LEGAL_MASK[p]: 9-bit integer with bit i set when cell i is empty
+# CANONICAL[p]: smallest index among the 8 symmetric variants of p
+# CANONICAL_SYMMETRY[p]: symmetry s with BOARDS[p][SYMMETRIES[s]] == BOARDS[CANONICAL[p]]
+BOARDS, WINNER, LEGAL_MASK, CANONICAL, CANONICAL_SYMMETRY = _build_tables()
+
+# Plain Python copies for fast scalar lookups in the per-move hot path
+WINNER_LIST = WINNER.tolist()
+# MASK_ACTIONS[mask]: tuple of the cells set in a 9-bit mask
+MASK_ACTIONS = [tuple(i for i in range(9) if mask >> i & 1) for mask in range(1 << 9)]
+LEGAL_ACTIONS = [MASK_ACTIONS[mask] for mask in LEGAL_MASK.tolist()]
+
+
+# _MOVE_OFFSETS[cell][i]: contribution of `cell` (1, -1 or 0) at position i
+_MOVE_OFFSETS = {player: [digit * 3 ** i for i in range(9)] for player, digit in CELL_DIGIT.items()}
+
+
+def encode(board):
+    """Base-3 index of a 9-cell board"""
+    index = 0
+    for i, cell in enumerate(board):
+        index += _MOVE_OFFSETS[cell][i]
+    return index
+
+
+def encode_batch(boards):
+    """Base-3 indices of an (N, 9) array of boards"""
+    digits = np.where(np.asarray(boards) == -1, 2, boards).astype(np.int64)
+    return digits @ POWERS
+
+
+def decode(index):
+    """Board (list of 9 cells) for a base-3 index"""
+    return BOARDS[index].tolist()
+
+
+def play(index, action, player):
+    """Index after `player` moves on the empty cell `action`"""
+    return index + _MOVE_OFFSETS[player][action]
+
+
+def to_bits(index):
+    """(x_bits, o_bits) pair of 9-bit integers for a position"""
+    board = BOARDS[index]
+    x_bits = int(((board == 1) * (1 << np.arange(9))).sum())
+    o_bits = int(((board == -1) * (1 << np.arange(9))).sum())
+    return x_bits, o_bits
+
+
+def player_to_move(board):
+    """X (1) moves when both sides have the same number of pieces"""
+    pieces = sum(1 for cell in board if cell != 0)
+    return 1 if pieces % 2 == 0 else -1
+
+
+def transform_action(action, symmetry):
+    """Cell that `action` maps to on a board transformed by `symmetry`"""
+    return int(INVERSE_SYMMETRIES[symmetry][action])
+
+
+def canonicalize(boards):
+    """Canonical variant of each board in an (N, 9) array, plus the permutation used
+
+    canonical[n] == boards[n][perms[n]]; a move `a` on the canonical board is
+    the move perms[n][a] on the original one.
+    """
+    boards = np.asarray(boards)
+    perms = SYMMETRIES[CANONICAL_SYMMETRY[encode_batch(boards)]]
+    return np.take_along_axis(boards, perms, axis=1), perms
+
+
+def symmetric_transitions(state, action, next_state):
+    """The distinct (state, action, next_state) images of a transition under the 8 symmetries"""
+    state = np.asarray(state)
+    next_state = np.asarray(next_state)
+    seen = set()
+    variants = []
+    for symmetry, perm in enumerate(SYMMETRIES):
+        variant_state = state[perm]
+        variant_action = int(INVERSE_SYMMETRIES[symmetry][action])
+        key = (variant_state.tobytes(), variant_action)
+        if key not in seen:
+            seen.add(key)
+            variants.append((variant_state, variant_action, next_state[perm]))
+    return variants
+
+
+def reachable_positions():
+    """Indices of all positions reachable from the empty board in legal play"""
+    seen = {0}
+    frontier = [0]
+    while frontier:
+        next_frontier = []
+        for index in frontier:
+            if WINNER_LIST[index] != 0:
+                continue
+            player = player_to_move(BOARDS[index])
+            for action in LEGAL_ACTIONS[index]:
+                child = play(index, action, player)
+                if child not in seen:
+                    seen.add(child)
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return np.array(sorted(seen), dtype=np.int64)
@@ -1,68 +1,200 @@
+import numpy as np
+
+from core.bitboard import LEGAL_ACTIONS, WINNER_LIST, encode, play
+from utils.profiler import profiled
+
+
+# Zero-sum rewards from the perspective of the player who just moved. A loss
+# is never rewarded directly: it reaches the loser through the negamax
+# bootstrap in TicTacToeAI.replay.
+WIN_REWARD = 1.0
+DRAW_REWARD = 0.0
+
+
+def mover_reward(game):
+    """Learning reward for the move that was just played"""
+    if game.winner is not None:
+        return WIN_REWARD  # Only the player who just moved can have won
+    return DRAW_REWARD if game.done else 0.0
+
+
+# Line directions for k-in-a-row: right, down, down-right, down-left
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def winning_lines(rows, cols, k):
+    """Cell indices of every k-in-a-row segment on a rows x cols board, as a (L, k) array"""
+    lines = []
+    for r in range(rows):
+        for c in range(cols):
+            for dr, dc in DIRECTIONS:
+                if 0 <= r + dr * (k - 1) < rows and 0 <= c + dc * (k - 1) < cols:
+                    lines.append([(r + dr * i) * cols + c + dc * i for i in range(k)])
+    return np.array(lines, dtype=np.int64).reshape(-1, k)
+
+
+def board_shape(player):
+    """(rows, cols, k) of the board a player or AI was built for; 3x3 by default"""
+    if not hasattr(player, 'k'):
+        return 3, 3, 3
+    return player.rows, player.cols, player.k
+
+
 class TicTacToeGame:
-    def __init__(self):
+    """m x n board with k in a row to win (3 x 3 x 3 by default)
+    
+    The classic 3x3 game runs on the precomputed position tables in
+    core.bitboard. Other sizes keep a list of empty cells that is updated
+    in O(1) per move and only look at the lines through the last move, so
+    a move costs O(k) whatever the board size. make_move returns a copy of
+    the board unless called with copy=False, which hot loops use to stay O(k).
+    """
+    def __init__(self, rows=3, cols=3, k=3):
+        if rows < 1 or cols < 1 or not 1 <= k <= max(rows, cols):
+            raise ValueError(f"Invalid board: {rows}x{cols} with {k} in a row")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.classic = (rows, cols, k) == (3, 3, 3)
         self.reset()
     
     def reset(self):
-        self.board = [0] * 9  # 0: empty, 1: X, -1: O
+        self.board = [0] * self.size  # 0: empty, 1: X, -1: O
         self.current_player = 1  # X starts
         self.done = False
         self.winner = None
         return self.board.copy()
     
+    @property
+    def board(self):
+        return self._board
+    
+    @board.setter
+    def board(self, board):
+        # Assigning a whole board re-syncs the position index / empty cell list
+        self._board = board
+        if self.classic:
+            self.position = encode(board)
+        else:
+            self.position = None
+            self._free = [cell for cell in range(self.size) if board[cell] == 0]
+            self._free_slot = [-1] * self.size
+            for slot, cell in enumerate(self._free):
+                self._free_slot[cell] = slot
+    
     def get_available_actions(self):
-        return [i for i, cell in enumerate(self.board) if cell == 0]
+        return list(self._available_actions())
+    
+    def _available_actions(self):
+        """Empty cells without a copy: the position table's tuple on 3x3, else the
+        live list of empty cells that the next move reorders. Never mutate it."""
+        if self.classic:
+            return LEGAL_ACTIONS[self.position]
+        return self._free
     
-    def make_move(self, action):
-        """Execute a move"""
-        if self.board[action] != 0 or self.done:
+    @profiled()
+    def make_move(self, action, copy=True):
+        """Execute a move and return (board, reward, done)
+        
+        With copy=False the returned board is the game's own list, which the
+        following moves update in place: snapshot it before storing it.
+        """
+        if not self.classic:
+            return self._make_move_mnk(action, copy)
+        if self.done or self._board[action] != 0:
             return None, -10, True  # Illegal move
         
-        self.board[action] = self.current_player
+        self._board[action] = self.current_player
+        self.position = play(self.position, action, self.current_player)
         
         # Check win
-        if self.check_win(self.current_player):
+        if WINNER_LIST[self.position] == self.current_player:
             self.done = True
             self.winner = self.current_player
-            return self.board.copy(), 10, True
+            return self._board.copy() if copy else self._board, 10, True
         
         # Check draw
-        if len(self.get_available_actions()) == 0:
+        if not LEGAL_ACTIONS[self.position]:
             self.done = True
-            return self.board.copy(), 0, True
+            return self._board.copy() if copy else self._board, 0, True
         
         # Switch player
         self.current_player = -self.current_player
-        return self.board.copy(), 1, False  # Small reward for valid move
+        return self._board.copy() if copy else self._board, 1, False  # Small reward for valid move
+    
+    def _make_move_mnk(self, action, copy):
+        if self.done or not 0 <= action < self.size or self._board[action] != 0:
+            return None, -10, True  # Illegal move
+        
+        player = self.current_player
+        self._board[action] = player
+        
+        # Swap-remove the cell from the empty cell list
+        slot = self._free_slot[action]
+        last = self._free.pop()
+        if last != action:
+            self._free[slot] = last
+            self._free_slot[last] = slot
+        self._free_slot[action] = -1
+        
+        if self._line_length(action, player) >= self.k:
+            self.done = True
+            self.winner = player
+            return self._board.copy() if copy else self._board, 10, True
+        
+        if not self._free:
+            self.done = True
+            return self._board.copy() if copy else self._board, 0, True
+        
+        self.current_player = -player
+        return self._board.copy() if copy else self._board, 1, False
+    
+    def _line_length(self, cell, player):
+        """Longest run of `player` stones through `cell`, counted up to k"""
+        board, rows, cols, k = self._board, self.rows, self.cols, self.k
+        r, c = divmod(cell, cols)
+        longest = 0
+        for dr, dc in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                rr, cc = r + sign * dr, c + sign * dc
+                while count < k and 0 <= rr < rows and 0 <= cc < cols and board[rr * cols + cc] == player:
+                    count += 1
+                    rr += sign * dr
+                    cc += sign * dc
+            longest = max(longest, count)
+            if longest >= k:
+                break
+        return longest
     
     def check_win(self, player):
         """Check if a player has won"""
-        board = self.board
-        # Rows
-        for i in range(0, 9, 3):
-            if board[i] == board[i+1] == board[i+2] == player:
-                return True
-        # Columns
-        for i in range(3):
-            if board[i] == board[i+3] == board[i+6] == player:
-                return True
-        # Diagonals
-        if board[0] == board[4] == board[8] == player:
-            return True
-        if board[2] == board[4] == board[6] == player:
-            return True
-        return False
+        if self.classic:
+            return WINNER_LIST[self.position] == player
+        return any(self._board[cell] == player and self._line_length(cell, player) >= self.k
+                   for cell in range(self.size))
     
     def display_board(self):
         """Display board in readable format"""
         symbols = {0: ' ', 1: 'X', -1: 'O'}
         board_str = ""
-        for i in range(0, 9, 3):
-            row = [symbols[self.board[i+j]] for j in range(3)]
+        for i in range(0, self.size, self.cols):
+            row = [symbols[self.board[i+j]] for j in range(self.cols)]
             board_str += " " + " | ".join(row) + " \n"
-            if i < 6:
-                board_str += "-----------\n"
+            if i < self.size - self.cols:
+                board_str += "-" * (4 * self.cols - 1) + "\n"
         return board_str
     
+    def display_cell_numbers(self):
+        """Board layout with the cell number in each square"""
+        width = len(str(self.size - 1))
+        lines = []
+        for i in range(0, self.size, self.cols):
+            lines.append(" " + " | ".join(str(i + j).rjust(width) for j in range(self.cols)) + " ")
+        separator = "-" * ((width + 3) * self.cols - 1)
+        return ("\n" + separator + "\n").join(lines)
+    
     def get_game_state(self):
         """Return current game state"""
         return {
@@ -71,4 +203,130 @@ class TicTacToeGame:
             'done': self.done,
             'winner': self.winner,
             'available_moves': self.get_available_actions()
-        }
\ No newline at end of file
+        }
+
+# Indices of the 8 winning lines (rows, columns, diagonals)
+WIN_LINES = np.array([
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],
+    [0, 4, 8], [2, 4, 6]
+])
+
+# (9, 8) matrix: LINE_MASKS[cell, line] = 1 if cell belongs to line (3x3 board)
+LINE_MASKS = np.zeros((9, len(WIN_LINES)), dtype=np.int8)
+for _line, _cells in enumerate(WIN_LINES):
+    LINE_MASKS[_cells, _line] = 1
+
+
+# Boards up to this many cells check wins with a full-board scan in batch mode
+SMALL_BOARD_CELLS = 16
+
+
+class BatchTicTacToeGame:
+    """Run N independent games at once on a single (N, rows * cols) NumPy array"""
+    def __init__(self, num_games, auto_reset=True, rows=3, cols=3, k=3):
+        self.num_games = num_games
+        self.auto_reset = auto_reset
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.boards = np.zeros((num_games, self.size), dtype=np.int8)
+        self.current_players = np.ones(num_games, dtype=np.int8)
+        self.done = np.zeros(num_games, dtype=bool)
+        self.winners = np.zeros(num_games, dtype=np.int8)  # 0: no winner / draw
+        self._rows = np.arange(num_games)
+        
+        if (rows, cols, k) == (3, 3, 3):
+            lines = WIN_LINES
+            self.line_masks = LINE_MASKS
+        else:
+            lines = winning_lines(rows, cols, k)
+            self.line_masks = np.zeros((self.size, len(lines)), dtype=np.int8)
+            for line, cells in enumerate(lines):
+                self.line_masks[cells, line] = 1
+        # Lines through each cell (padded, with a validity mask), so a move
+        # only checks the lines it can have completed
+        per_cell = [np.flatnonzero(self.line_masks[cell]) for cell in range(self.size)]
+        width = max(1, max(len(ids) for ids in per_cell))
+        self._cell_lines = np.zeros((self.size, width), dtype=np.int64)
+        self._cell_lines_valid = np.zeros((self.size, width), dtype=bool)
+        for cell, ids in enumerate(per_cell):
+            self._cell_lines[cell, :len(ids)] = ids
+            self._cell_lines_valid[cell, :len(ids)] = True
+        self._lines = np.asarray(lines, dtype=np.int64).reshape(-1, k)
+    
+    def reset(self, indices=None):
+        """Reset all games, or only the games in `indices`"""
+        if indices is None:
+            indices = slice(None)
+        self._clear_boards(indices)
+        self.winners[indices] = 0
+        return self.boards.copy()
+    
+    def _clear_boards(self, indices):
+        self.boards[indices] = 0
+        self.current_players[indices] = 1
+        self.done[indices] = False
+    
+    def get_legal_masks(self):
+        """Boolean (N, rows * cols) mask of empty cells"""
+        return self.boards == 0
+    
+    def check_wins(self, players):
+        """Boolean (N,) array: True where players[i] owns a full line on board i"""
+        owned = (self.boards == players[:, None]).astype(np.int8)
+        return (owned @ self.line_masks == self.k).any(axis=1)
+    
+    def _wins_through(self, actions, players):
+        """Boolean (N,) array: True where the stone on actions[i] completes a line"""
+        cells = self._lines[self._cell_lines[actions]]  # (N, lines per cell, k)
+        owned = self.boards[self._rows[:, None, None], cells] == players[:, None, None]
+        return (owned.all(axis=2) & self._cell_lines_valid[actions]).any(axis=1)
+    
+    @profiled()
+    def make_moves(self, actions, mask=None):
+        """Execute one move on every unfinished board (or only those in `mask`)
+        
+        Returns (next_boards, rewards, dones) with the same reward scheme as
+        TicTacToeGame.make_move. Finished games keep their final board in
+        next_boards and their result in self.winners; with auto_reset they
+        are reset afterwards so the next call starts a fresh game. Without
+        auto_reset, boards that were already finished are left untouched.
+        Boards outside `mask` are left untouched as well and get reward 0.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = self._rows
+        players = self.current_players.copy()
+        was_done = self.done.copy()
+        active = ~was_done if mask is None else ~was_done & mask
+        
+        safe_actions = np.clip(actions, 0, self.size - 1)
+        occupied = (self.boards[rows, safe_actions] != 0) | (actions != safe_actions)
+        illegal = active & occupied
+        legal = active & ~occupied
+        self.boards[rows[legal], actions[legal]] = players[legal]
+        
+        # Small boards are cheaper to scan whole with one matmul
+        if self.size <= SMALL_BOARD_CELLS:
+            won = legal & self.check_wins(players)
+        else:
+            won = legal & self._wins_through(safe_actions, players)
+        draw = legal & ~won & ~(self.boards == 0).any(axis=1)
+        finished = won | draw | illegal
+        
+        rewards = np.ones(self.num_games, dtype=np.float32)
+        rewards[won] = 10
+        rewards[draw] = 0
+        rewards[illegal] = -10
+        rewards[~active] = 0
+        
+        self.winners[active] = np.where(won, players, 0)[active]
+        self.done |= finished
+        self.current_players[legal & ~finished] *= -1
+        
+        next_boards = self.boards.copy()
+        if self.auto_reset and finished.any():
+            # winners stay readable until the next step
+            self._clear_boards(np.flatnonzero(finished))
+        return next_boards, rewards, finished | was_done
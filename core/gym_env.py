@@ -0,0 +1,440 @@
+import os
+import random
+import traceback
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+from core.game_environment import TicTacToeGame, BatchTicTacToeGame, WIN_REWARD, DRAW_REWARD
+
+# Gymnasium-style environments. gymnasium itself is optional: the classes
+# follow its reset/step API and only import it to build action_space /
+# observation_space.
+#
+# Observations are int8 boards from the perspective of the side to move
+# (own stones +1, opponent stones -1), the encoding the networks use.
+# info['action_mask'] marks the playable cells. An illegal action ends the
+# episode with ILLEGAL_MOVE_REWARD instead of returning a sentinel.
+
+ILLEGAL_MOVE_REWARD = -1.0
+
+
+def _load_opponent(opponent):
+    if isinstance(opponent, str):
+        from utils.evaluation import load_player
+        return load_player(opponent)
+    return opponent
+
+
+def _seed_everything(seed):
+    # Opponents (random player, solver, networks with epsilon) draw from the global generators
+    random.seed(seed)
+    np.random.seed(seed % 2 ** 32)
+
+
+def _check_agent_side(agent_side):
+    if agent_side not in (1, -1, 'alternate'):
+        raise ValueError(f"agent_side must be 1, -1 or 'alternate', not {agent_side!r}")
+
+
+class TicTacToeEnv:
+    """Single Tic-Tac-Toe environment on the m,n,k rules of TicTacToeGame
+
+    Without an opponent the agent plays both sides and every step is
+    rewarded from the perspective of the player who moved. With an
+    opponent (a load_player spec such as 'random' or 'solver', or any
+    object with choose_actions) the agent plays `agent_side` (1: X, -1: O,
+    'alternate': switch every reset) and the opponent's reply is part of
+    each step; a game lost on that reply is rewarded -WIN_REWARD.
+    """
+    metadata = {'render_modes': ['human', 'ansi']}
+
+    def __init__(self, rows=3, cols=3, k=3, opponent=None, agent_side=1, opponent_epsilon=0.0,
+                 render_mode=None):
+        _check_agent_side(agent_side)
+        self.game = TicTacToeGame(rows, cols, k)
+        self.size = self.game.size
+        self.opponent = _load_opponent(opponent)
+        self.agent_side = agent_side
+        self.opponent_epsilon = opponent_epsilon
+        self.render_mode = render_mode
+        self._side = -1 if agent_side == 'alternate' else agent_side
+
+    @property
+    def action_space(self):
+        from gymnasium import spaces
+        return spaces.Discrete(self.size)
+
+    @property
+    def observation_space(self):
+        from gymnasium import spaces
+        return spaces.Box(-1, 1, (self.size,), np.int8)
+
+    def _observation(self):
+        return np.asarray(self.game.board, dtype=np.int8) * np.int8(self.game.current_player)
+
+    def _info(self, illegal=False):
+        game = self.game
+        return {
+            'action_mask': np.asarray(game.board) == 0,
+            'player': game.current_player,
+            'winner': game.winner or 0,
+            'illegal_move': illegal
+        }
+
+    def _opponent_move(self):
+        board = np.asarray(self.game.board, dtype=np.int8)[None]
+        action = self.opponent.choose_actions(board, board == 0, epsilon=self.opponent_epsilon)[0]
+        return self.game.make_move(int(action), copy=False)
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            _seed_everything(seed)
+        self.game.reset()
+        if self.opponent is not None:
+            if self.agent_side == 'alternate':
+                self._side = -self._side
+            if self._side == -1:
+                self._opponent_move()
+        return self._observation(), self._info()
+
+    def step(self, action):
+        """Returns (observation, reward, terminated, truncated, info)"""
+        game = self.game
+        if game.done:
+            raise RuntimeError("step() called on a finished game; call reset() first")
+        player = game.current_player
+        action = int(action)
+        if not 0 <= action < self.size or game.board[action] != 0:
+            game.done = True
+            return self._observation(), ILLEGAL_MOVE_REWARD, True, False, self._info(illegal=True)
+
+        game.make_move(action, copy=False)
+        if game.winner == player:
+            reward = WIN_REWARD
+        elif game.done:
+            reward = DRAW_REWARD
+        else:
+            reward = 0.0
+            if self.opponent is not None:
+                self._opponent_move()
+                if game.winner == -player:
+                    reward = -WIN_REWARD
+                elif game.done:
+                    reward = DRAW_REWARD
+        if self.render_mode == 'human':
+            self.render()
+        return self._observation(), reward, game.done, False, self._info()
+
+    def render(self):
+        board = self.game.display_board()
+        if self.render_mode == 'ansi':
+            return board
+        print(board)
+
+    def close(self):
+        pass
+
+
+# Per-step output arrays of a vector environment: name -> (dtype, per-env shape
+# given the number of cells). AsyncVectorEnv allocates them in shared memory.
+VECTOR_BUFFERS = {
+    'observations': (np.int8, lambda cells: (cells,)),
+    'rewards': (np.float32, lambda cells: ()),
+    'terminated': (np.bool_, lambda cells: ()),
+    'truncated': (np.bool_, lambda cells: ()),
+    'action_mask': (np.bool_, lambda cells: (cells,)),
+    'winner': (np.int8, lambda cells: ()),
+    'final_observation': (np.int8, lambda cells: (cells,)),
+    'actions': (np.int64, lambda cells: ())
+}
+
+
+def _allocate_buffers(num_envs, cells):
+    return {name: np.zeros((num_envs,) + shape(cells), dtype=dtype)
+            for name, (dtype, shape) in VECTOR_BUFFERS.items()}
+
+
+def _vector_outputs(buffers, copy):
+    """(observations, rewards, terminated, truncated, infos) from the step buffers"""
+    def get(name):
+        return buffers[name].copy() if copy else buffers[name]
+    infos = {name: get(name) for name in ('action_mask', 'winner', 'final_observation')}
+    return get('observations'), get('rewards'), get('terminated'), get('truncated'), infos
+
+
+class SyncVectorEnv:
+    """num_envs environments stepped together on one BatchTicTacToeGame
+
+    step(actions) takes an (N,) array and returns (observations,
+    rewards, terminated, truncated, infos) as arrays, with infos holding
+    'action_mask', 'winner' and 'final_observation'. Finished environments
+    are reset within the same step: their observation is the start of the
+    next game and the last board of the finished one is in
+    infos['final_observation'] (seen by the player who just moved).
+    With agent_side='alternate' the agent is X in even and O in odd
+    environments. The opponent's moves are batched over all environments.
+    """
+    def __init__(self, num_envs, rows=3, cols=3, k=3, opponent=None, agent_side=1,
+                 opponent_epsilon=0.0, copy=True, buffers=None):
+        _check_agent_side(agent_side)
+        self.num_envs = num_envs
+        self.game = BatchTicTacToeGame(num_envs, auto_reset=False, rows=rows, cols=cols, k=k)
+        self.size = self.game.size
+        self.opponent = _load_opponent(opponent)
+        self.opponent_epsilon = opponent_epsilon
+        if agent_side == 'alternate':
+            self.agent_sides = np.where(np.arange(num_envs) % 2 == 0, 1, -1).astype(np.int8)
+        else:
+            self.agent_sides = np.full(num_envs, agent_side, dtype=np.int8)
+        self.copy = copy
+        self.buffers = buffers if buffers is not None else _allocate_buffers(num_envs, self.size)
+
+    @property
+    def single_action_space(self):
+        from gymnasium import spaces
+        return spaces.Discrete(self.size)
+
+    @property
+    def single_observation_space(self):
+        from gymnasium import spaces
+        return spaces.Box(-1, 1, (self.size,), np.int8)
+
+    @property
+    def action_space(self):
+        from gymnasium import spaces
+        return spaces.MultiDiscrete(np.full(self.num_envs, self.size))
+
+    @property
+    def observation_space(self):
+        from gymnasium import spaces
+        return spaces.Box(-1, 1, (self.num_envs, self.size), np.int8)
+
+    def _opponent_moves(self, mask):
+        """Opponent move on every unfinished board in mask; returns the make_moves rewards"""
+        game = self.game
+        mask = mask & ~game.done
+        if not mask.any():
+            return np.zeros(self.num_envs, dtype=np.float32)
+        actions = np.zeros(self.num_envs, dtype=np.int64)
+        boards = game.boards[mask]
+        actions[mask] = self.opponent.choose_actions(boards, boards == 0, epsilon=self.opponent_epsilon)
+        return game.make_moves(actions, mask)[1]
+
+    def _start_games(self, indices):
+        self.game.reset(indices)
+        if self.opponent is not None:
+            opening = np.zeros(self.num_envs, dtype=bool)
+            opening[indices] = self.agent_sides[indices] == -1
+            self._opponent_moves(opening)
+
+    def _write_observations(self):
+        game = self.game
+        buffers = self.buffers
+        np.multiply(game.boards, game.current_players[:, None], out=buffers['observations'])
+        np.equal(game.boards, 0, out=buffers['action_mask'])
+
+    def reset(self, seed=None, options=None):
+        """Returns (observations, infos)"""
+        if seed is not None:
+            _seed_everything(seed)
+        self._reset_buffers()
+        observations, _, _, _, infos = _vector_outputs(self.buffers, self.copy)
+        return observations, infos
+
+    def _reset_buffers(self):
+        self._start_games(np.arange(self.num_envs))
+        buffers = self.buffers
+        for name in ('rewards', 'terminated', 'truncated', 'winner', 'final_observation'):
+            buffers[name][...] = 0
+        self._write_observations()
+
+    def step(self, actions):
+        self.buffers['actions'][...] = actions
+        self._step_buffers()
+        return _vector_outputs(self.buffers, self.copy)
+
+    def _step_buffers(self):
+        """Step with the actions in buffers['actions'], writing every result into the buffers"""
+        game = self.game
+        buffers = self.buffers
+        players = game.current_players.copy()
+        _, move_rewards, dones = game.make_moves(buffers['actions'])
+
+        rewards = buffers['rewards']
+        rewards[...] = 0.0
+        rewards[move_rewards == 10] = WIN_REWARD
+        rewards[dones & (move_rewards == 0)] = DRAW_REWARD
+        rewards[move_rewards == -10] = ILLEGAL_MOVE_REWARD
+
+        if self.opponent is not None:
+            replied = ~dones
+            reply_rewards = self._opponent_moves(replied)
+            rewards[replied & game.done & (reply_rewards == 0)] = DRAW_REWARD
+            rewards[reply_rewards == 10] = -WIN_REWARD
+            rewards[reply_rewards == -10] = WIN_REWARD  # An opponent that plays illegally forfeits
+
+        finished = game.done.copy()
+        buffers['terminated'][...] = finished
+        buffers['truncated'][...] = False
+        buffers['winner'][...] = game.winners
+        np.multiply(game.boards, players[:, None], out=buffers['final_observation'])
+        if finished.any():
+            self._start_games(np.flatnonzero(finished))
+        self._write_observations()
+
+    def close(self):
+        pass
+
+
+def _worker(conn, shm_names, num_envs, begin, end, env_kwargs):
+    blocks = []
+    buffers = {}
+    try:
+        cells = env_kwargs['rows'] * env_kwargs['cols']
+        for name, (dtype, shape) in VECTOR_BUFFERS.items():
+            block = shared_memory.SharedMemory(name=shm_names[name])
+            blocks.append(block)
+            array = np.ndarray((num_envs,) + shape(cells), dtype=dtype, buffer=block.buf)
+            buffers[name] = array[begin:end]
+        env = SyncVectorEnv(end - begin, buffers=buffers, **env_kwargs)
+        conn.send(('ready', None))
+        while True:
+            command, data = conn.recv()
+            if command == 'reset':
+                if data is not None:
+                    _seed_everything(data)
+                env._reset_buffers()
+            elif command == 'step':
+                env._step_buffers()
+            elif command == 'close':
+                break
+            conn.send(('ok', None))
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception:
+        conn.send(('error', traceback.format_exc()))
+    finally:
+        del buffers
+        for block in blocks:
+            block.close()
+        conn.close()
+
+
+class AsyncVectorEnv:
+    """SyncVectorEnv split across worker processes sharing memory with this one
+
+    Each worker steps a contiguous slice of the environments. Actions and
+    every per-step output live in shared memory, so a step only sends a
+    one-word command down each pipe. Same API as SyncVectorEnv, plus
+    step_async / step_wait to overlap stepping with other work. Opponents
+    are passed to the workers by spec (e.g. 'solver') or pickled.
+    """
+    def __init__(self, num_envs, num_workers=None, rows=3, cols=3, k=3, opponent=None, agent_side=1,
+                 opponent_epsilon=0.0, copy=True):
+        _check_agent_side(agent_side)
+        num_workers = min(num_envs, num_workers or os.cpu_count() or 1)
+        self.num_envs = num_envs
+        self.num_workers = num_workers
+        self.size = rows * cols
+        self.copy = copy
+        self._blocks = {}
+        self.buffers = {}
+        for name, (dtype, shape) in VECTOR_BUFFERS.items():
+            nbytes = max(1, num_envs * int(np.prod(shape(self.size), dtype=np.int64)) * np.dtype(dtype).itemsize)
+            block = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._blocks[name] = block
+            self.buffers[name] = np.ndarray((num_envs,) + shape(self.size), dtype=dtype, buffer=block.buf)
+
+        env_kwargs = {'rows': rows, 'cols': cols, 'k': k, 'opponent': opponent,
+                      'agent_side': agent_side, 'opponent_epsilon': opponent_epsilon}
+        shm_names = {name: block.name for name, block in self._blocks.items()}
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        ctx = multiprocessing.get_context("spawn")
+        self._pipes = []
+        self._processes = []
+        self._waiting = False
+        self.closed = False
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker, daemon=True,
+                                  args=(child, shm_names, num_envs, begin, end, env_kwargs))
+            process.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(process)
+        self._receive()
+
+    def _worker_died(self, error):
+        """Shut the remaining workers down and free the shared memory before raising"""
+        self.close()
+        exit_codes = [process.exitcode for process in self._processes]
+        raise RuntimeError(f"Vector environment worker exited unexpectedly (exit codes {exit_codes})") from error
+
+    def _send(self, pipe, command, data=None):
+        try:
+            pipe.send((command, data))
+        except (EOFError, OSError) as error:
+            self._worker_died(error)
+
+    def _receive(self):
+        errors = []
+        try:
+            for pipe in self._pipes:
+                status, data = pipe.recv()
+                if status == 'error':
+                    errors.append(data)
+        except (EOFError, OSError) as error:
+            self._worker_died(error)
+        if errors:
+            self.close()
+            raise RuntimeError("Vector environment worker failed:\n" + errors[0])
+
+    def reset(self, seed=None, options=None):
+        for i, pipe in enumerate(self._pipes):
+            self._send(pipe, 'reset', None if seed is None else seed + i)
+        self._receive()
+        observations, _, _, _, infos = _vector_outputs(self.buffers, self.copy)
+        return observations, infos
+
+    def step_async(self, actions):
+        if self._waiting:
+            raise RuntimeError("step_async called twice without step_wait")
+        self.buffers['actions'][...] = actions
+        for pipe in self._pipes:
+            self._send(pipe, 'step')
+        self._waiting = True
+
+    def step_wait(self):
+        self._receive()
+        self._waiting = False
+        return _vector_outputs(self.buffers, self.copy)
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for pipe, process in zip(self._pipes, self._processes):
+            try:
+                pipe.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            pipe.close()
+        self.buffers = {}
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
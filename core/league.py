@@ -0,0 +1,293 @@
+import sys
+import os
+import json
+import argparse
+import numpy as np
+from termcolor import cprint
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.neural_network import TicTacToeAI
+from core.game_environment import BatchTicTacToeGame, WIN_REWARD, DRAW_REWARD
+from utils.evaluation import load_player
+from utils.monitor import TrainingMonitor
+from utils.profiler import section
+
+MATCHMAKING = ('elo', 'winrate', 'uniform')
+
+
+def expected_score(rating, opponent_rating):
+    """Elo expected score (win 1, draw 0.5) of `rating` against `opponent_rating`"""
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+class League:
+    """Opponent pool with an Elo table, persisted to directory/league.json
+
+    The pool holds the built-in 'random' and 'solver' players plus frozen
+    snapshots of the learner (at most max_snapshots, oldest evicted first).
+    Opponents are drawn by matchmaking:
+      'elo'      prefer opponents the learner is expected to score ~50% against
+      'winrate'  prefer opponents the learner has scored worst against so far
+      'uniform'  any opponent with equal probability
+    Ratings are updated once per round from the learner's mean score;
+    'random' is the fixed anchor of the scale.
+    """
+    def __init__(self, directory="league", max_snapshots=10, include_random=True,
+                 include_solver=True, matchmaking='elo', k_factor=32, initial_rating=1000):
+        if matchmaking not in MATCHMAKING:
+            raise ValueError(f"Unknown matchmaking: {matchmaking}")
+        self.directory = directory
+        self.max_snapshots = max_snapshots
+        self.matchmaking = matchmaking
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.path = os.path.join(directory, "league.json")
+        self._players = {}
+        os.makedirs(directory, exist_ok=True)
+
+        self.learner = self._new_entry('learner', 'learner')
+        self.opponents = {}
+        if os.path.exists(self.path):
+            self.load()
+        for name, enabled in (('random', include_random), ('solver', include_solver)):
+            if enabled and name not in self.opponents:
+                self.opponents[name] = self._new_entry(name, name)
+            elif not enabled:
+                self.opponents.pop(name, None)
+
+    def _new_entry(self, name, kind, path=None, episode=None):
+        return {'name': name, 'kind': kind, 'path': path, 'episode': episode,
+                'rating': self.initial_rating, 'games': 0, 'wins': 0, 'draws': 0, 'losses': 0}
+
+    def load(self):
+        with open(self.path) as f:
+            state = json.load(f)
+        self.learner = state['learner']
+        self.opponents = {entry['name']: entry for entry in state['opponents']
+                          if entry['kind'] != 'snapshot' or os.path.exists(entry['path'])}
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'learner': self.learner, 'opponents': list(self.opponents.values())}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def reset_learner(self):
+        """Start a new learner at the initial rating; the opponent pool is kept"""
+        self.learner = self._new_entry('learner', 'learner')
+
+    def snapshots(self):
+        return [entry for entry in self.opponents.values() if entry['kind'] == 'snapshot']
+
+    def add_snapshot(self, ai, episode):
+        """Freeze the learner into the pool at its current rating"""
+        name = f"snapshot_{episode:08d}"
+        path = os.path.join(self.directory, name + ".pth")
+        ai.save_model(path, include_memory=False)
+        entry = self._new_entry(name, 'snapshot', path, episode)
+        entry['rating'] = self.learner['rating']
+        self.opponents[name] = entry
+
+        snapshots = sorted(self.snapshots(), key=lambda e: e['episode'])
+        for old in snapshots[:max(0, len(snapshots) - self.max_snapshots)]:
+            del self.opponents[old['name']]
+            self._players.pop(old['name'], None)
+            os.remove(old['path'])
+        return name
+
+    def player(self, name):
+        """Frozen opponent player, loaded on first use"""
+        if name not in self._players:
+            entry = self.opponents[name]
+            self._players[name] = load_player(entry['path'] if entry['kind'] == 'snapshot' else entry['kind'])
+        return self._players[name]
+
+    def sample_opponent(self):
+        names = list(self.opponents)
+        if self.matchmaking == 'elo':
+            weights = []
+            for name in names:
+                p = expected_score(self.learner['rating'], self.opponents[name]['rating'])
+                weights.append(p * (1 - p))
+        elif self.matchmaking == 'winrate':
+            # Prioritized fictitious self-play: (1 - score)^2, score with a 50% prior
+            weights = []
+            for name in names:
+                entry = self.opponents[name]
+                score = (entry['wins'] + 0.5 * entry['draws'] + 1) / (entry['games'] + 2)
+                weights.append((1 - score) ** 2)
+        else:
+            weights = [1.0] * len(names)
+        weights = np.asarray(weights) + 1e-6  # Every opponent stays reachable
+        return names[np.random.choice(len(names), p=weights / weights.sum())]
+
+    def record(self, name, wins, draws, losses):
+        """Update the Elo table with a round of learner results against `name`"""
+        entry = self.opponents[name]
+        games = wins + draws + losses
+        for record in (self.learner, entry):
+            record['games'] += games
+        self.learner['wins'] += wins
+        self.learner['draws'] += draws
+        self.learner['losses'] += losses
+        # Per-opponent results are kept from the learner's point of view
+        entry['wins'] += wins
+        entry['draws'] += draws
+        entry['losses'] += losses
+
+        score = (wins + 0.5 * draws) / games
+        delta = self.k_factor * (score - expected_score(self.learner['rating'], entry['rating']))
+        self.learner['rating'] += delta
+        if name != 'random':
+            entry['rating'] -= delta
+
+    def table(self):
+        """Learner and opponents, highest rating first"""
+        return sorted([self.learner] + list(self.opponents.values()), key=lambda e: -e['rating'])
+
+    def print_table(self):
+        cprint("=== League Elo Table ===", "cyan", attrs=['bold'])
+        cprint(f"{'Player':<20}{'Elo':>8}{'Games':>8}{'Learner W/D/L':>20}", "white", attrs=['bold'])
+        for entry in self.table():
+            record = f"{entry['wins']}/{entry['draws']}/{entry['losses']}"
+            color = "green" if entry['kind'] == 'learner' else "white"
+            cprint(f"{entry['name']:<20}{entry['rating']:>8.0f}{entry['games']:>8}{record:>20}", color)
+
+
+def play_round(ai, opponent, num_games, opponent_epsilon=0.05, batch_size=16, replay_every=2,
+               monitor=None):
+    """Play num_games in lockstep, the learner as X in half of them and O in the rest
+
+    Every move of both sides is stored in the learner's replay memory: the
+    update is off-policy, and the opponents' moves are exactly the data that
+    self-play alone does not produce. One replay step runs per `replay_every`
+    moves. Returns (learner_sides, winners, total_loss, replay_steps).
+    """
+    env = BatchTicTacToeGame(num_games, auto_reset=False, rows=ai.rows, cols=ai.cols, k=ai.k)
+    learner_sides = np.where(np.arange(num_games) % 2 == 0, 1, -1)
+    side = 1
+    unreplayed_moves = 0
+    total_loss = 0.0
+    replays = 0
+    phase = monitor.phase if monitor is not None else section
+    while not env.done.all():
+        with phase('acting'):
+            active = ~env.done
+            boards = env.boards.copy()
+            actions = np.zeros(num_games, dtype=np.int64)
+            for turn, player, epsilon in ((active & (learner_sides == side), ai, None),
+                                          (active & (learner_sides != side), opponent, opponent_epsilon)):
+                if turn.any():
+                    actions[turn] = player.choose_actions(boards[turn], boards[turn] == 0, epsilon=epsilon)
+            next_boards, _, dones = env.make_moves(actions)
+        
+        for i in np.flatnonzero(active):
+            if env.winners[i] == side:
+                reward = WIN_REWARD
+            else:
+                reward = DRAW_REWARD if dones[i] else 0.0
+            ai.remember(boards[i], int(actions[i]), reward, next_boards[i], bool(dones[i]))
+        
+        unreplayed_moves += int(active.sum())
+        while unreplayed_moves >= replay_every:
+            unreplayed_moves -= replay_every
+            loss = ai.replay(batch_size=batch_size)
+            if loss is not None:
+                total_loss += loss
+                replays += 1
+        side = -side
+    return learner_sides, env.winners.copy(), total_loss, replays
+
+
+def train_league(episodes=1000, save_path="tictactoe_ai.pth", league_dir="league", ai=None,
+                 games_per_round=32, snapshot_every=200, max_snapshots=10, matchmaking='elo',
+                 opponent_epsilon=0.05, include_solver=True, batch_size=16, replay_every=2,
+                 log_path=None, **ai_config):
+    """Train against a league of past snapshots, a random player and the solver
+
+    Each round draws one opponent by matchmaking and plays games_per_round
+    batched games against it (half as X, half as O); as in train_ai, one
+    replay step runs per `replay_every` moves played. The learner is frozen
+    into the pool every `snapshot_every` episodes. ai_config is passed to
+    TicTacToeAI when no `ai` is given.
+    """
+    if ai is None:
+        ai = TicTacToeAI(**ai_config)
+        new_learner = True
+    else:
+        new_learner = False
+    include_solver = include_solver and (ai.rows, ai.cols, ai.k) == (3, 3, 3)
+    league = League(league_dir, max_snapshots=max_snapshots, include_solver=include_solver,
+                    matchmaking=matchmaking)
+    if new_learner:
+        league.reset_learner()
+    if not league.snapshots():
+        league.add_snapshot(ai, 0)
+    monitor = TrainingMonitor(log_path=log_path)
+    ai.phase_timer = monitor
+
+    cprint(f"Starting league training ({matchmaking} matchmaking)...", "cyan", attrs=['bold'])
+    episode = 0
+    next_snapshot = snapshot_every
+    while episode < episodes:
+        num_games = min(games_per_round, episodes - episode)
+        name = league.sample_opponent()
+        opponent = league.player(name)
+
+        learner_sides, winners, total_loss, replays = play_round(
+            ai, opponent, num_games, opponent_epsilon, batch_size, replay_every, monitor)
+        wins = int((winners == learner_sides).sum())
+        losses = int((winners == -learner_sides).sum())
+        league.record(name, wins, num_games - wins - losses, losses)
+        avg_loss = total_loss / replays if replays else 0
+        for won in (winners == learner_sides):
+            monitor.update(int(won), avg_loss, ai.epsilon)
+
+        episode += num_games
+        if episode >= next_snapshot:
+            league.add_snapshot(ai, episode)
+            next_snapshot += snapshot_every
+        league.save()
+        cprint(f"Episode {episode}: vs {name:<18} W/D/L {wins}/{num_games - wins - losses}/{losses}  "
+               f"Elo {league.learner['rating']:.0f}  Epsilon: {ai.epsilon:.3f}, Loss: {avg_loss:.3f}", "yellow")
+
+    ai.phase_timer = None
+    monitor.flush()
+    league.save()
+    ai.save_model(save_path)
+    cprint(f"League training completed! Model saved as {save_path}", "green", attrs=['bold'])
+    return ai, monitor, league
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train against a league of past snapshots, random and solver")
+    parser.add_argument("--episodes", type=int, default=2000)
+    parser.add_argument("--save-path", default="tictactoe_ai.pth")
+    parser.add_argument("--league-dir", default="league", help="snapshots and league.json Elo table")
+    parser.add_argument("--resume", action="store_true", help="keep training the model in --save-path")
+    parser.add_argument("--games-per-round", type=int, default=32)
+    parser.add_argument("--snapshot-every", type=int, default=200)
+    parser.add_argument("--max-snapshots", type=int, default=10)
+    parser.add_argument("--matchmaking", choices=MATCHMAKING, default="elo")
+    parser.add_argument("--opponent-epsilon", type=float, default=0.05)
+    parser.add_argument("--no-solver", action="store_true", help="leave the solver out of the pool")
+    parser.add_argument("--log", help="append per-episode metrics to this JSONL file")
+    args = parser.parse_args()
+
+    ai = None
+    if args.resume:
+        ai = TicTacToeAI()
+        ai.load_model(args.save_path)
+    ai, monitor, league = train_league(args.episodes, args.save_path, args.league_dir, ai,
+                                       games_per_round=args.games_per_round,
+                                       snapshot_every=args.snapshot_every,
+                                       max_snapshots=args.max_snapshots, matchmaking=args.matchmaking,
+                                       opponent_epsilon=args.opponent_epsilon,
+                                       include_solver=not args.no_solver, log_path=args.log)
+    league.print_table()
+    monitor.print_stats()
+
+
+if __name__ == "__main__":
+    main()
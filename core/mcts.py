@@ -0,0 +1,219 @@
+import time
+import numpy as np
+
+from core.game_environment import TicTacToeGame, board_shape
+
+
+class Node:
+    """Search node for one position; edge statistics are from the side to move here"""
+    __slots__ = ('board', 'player', 'terminal_value', 'value', 'actions', 'priors',
+                 'visits', 'values', 'children')
+
+    def __init__(self, board, player, terminal_value=None):
+        self.board = board  # Tuple of cells, also the transposition table key
+        self.player = player
+        self.terminal_value = terminal_value  # Game result for `player` once the game is over
+        self.value = None  # Network estimate for `player`
+        self.actions = None  # Set on expansion
+        self.priors = None
+        self.visits = None
+        self.values = None
+        self.children = None
+
+    @property
+    def expanded(self):
+        return self.actions is not None
+
+
+class MCTSPlayer:
+    """PUCT search guided by a Q-value network, with the TicTacToeAI interface
+
+    `network` is anything with q_values(states) -> (N, cells) array of
+    Q-values from the side to move (TicTacToeAI, NumpyTicTacToeAI,
+    TablePolicy). Priors are a softmax over the legal Q-values and a leaf is
+    worth its best legal Q-value. Each search runs `num_simulations`
+    simulations and/or stops after `time_limit_ms`; leaves are collected
+    `batch_size` at a time under a virtual loss and evaluated in a single
+    forward pass. The subtree of the chosen move is kept for the next call,
+    and with use_transpositions positions reached by different move orders
+    share one node.
+    """
+    def __init__(self, network, num_simulations=200, time_limit_ms=None, c_puct=1.5,
+                 prior_temperature=0.25, batch_size=8, virtual_loss=1.0,
+                 use_transpositions=False, max_table_size=1000000):
+        if num_simulations is None and time_limit_ms is None:
+            raise ValueError("Set num_simulations and/or time_limit_ms")
+        self.network = network
+        self.num_simulations = num_simulations
+        self.time_limit_ms = time_limit_ms
+        self.c_puct = c_puct
+        self.prior_temperature = prior_temperature
+        self.batch_size = batch_size
+        self.virtual_loss = virtual_loss
+        self.use_transpositions = use_transpositions
+        self.max_table_size = max_table_size
+        self.rows, self.cols, self.k = board_shape(network)
+        self.epsilon = 0.0  # Never explores at random
+        self._game = TicTacToeGame(self.rows, self.cols, self.k)
+        self.last_search = {}
+        self.reset()
+
+    def reset(self):
+        """Forget the search tree and transposition table"""
+        self.root = None
+        self.table = {} if self.use_transpositions else None
+
+    def _new_node(self, board, player, terminal_value=None):
+        if self.table is None:
+            return Node(board, player, terminal_value)
+        node = self.table.get(board)
+        if node is None:
+            if len(self.table) >= self.max_table_size:
+                self.table.clear()
+            node = self.table[board] = Node(board, player, terminal_value)
+        return node
+
+    def _find_root(self, board, player):
+        """Node for `board` from the previous search (our move plus the reply), if any"""
+        if self.table is not None:
+            node = self.table.get(board)
+            if node is not None and node.player == player:
+                return node
+        frontier = [self.root] if self.root is not None else []
+        for _ in range(3):
+            for node in frontier:
+                if node.board == board and node.player == player:
+                    return node
+            frontier = [child for node in frontier if node.expanded
+                        for child in node.children if child is not None]
+        return self._new_node(board, player)
+
+    def _child(self, node, i):
+        child = node.children[i]
+        if child is None:
+            game = self._game
+            game.board = list(node.board)
+            game.current_player = node.player
+            game.done = False
+            game.winner = None
+            next_board, _, done = game.make_move(int(node.actions[i]), copy=False)
+            terminal_value = None
+            if game.winner is not None:
+                terminal_value = -1.0  # The side to move in the child has lost
+            elif done:
+                terminal_value = 0.0
+            child = node.children[i] = self._new_node(tuple(next_board), -node.player, terminal_value)
+        return child
+
+    def _expand(self, node, q_values):
+        legal = np.flatnonzero(np.asarray(node.board) == 0)
+        q_legal = np.asarray(q_values, dtype=np.float64)[legal]
+        logits = (q_legal - q_legal.max()) / self.prior_temperature
+        priors = np.exp(logits)
+        node.actions = legal
+        node.priors = priors / priors.sum()
+        node.visits = np.zeros(len(legal))
+        node.values = np.zeros(len(legal))
+        node.children = [None] * len(legal)
+        node.value = float(np.clip(q_legal.max(), -1.0, 1.0))
+
+    def _evaluate(self, nodes):
+        q_values = self.network.q_values(np.array([node.board for node in nodes], dtype=np.int8))
+        for node, row in zip(nodes, q_values):
+            if not node.expanded:
+                self._expand(node, row)
+
+    def _select(self, node):
+        visits = node.visits
+        q = np.divide(node.values, visits, out=np.zeros_like(visits), where=visits > 0)
+        u = self.c_puct * node.priors * np.sqrt(visits.sum() + 1) / (1 + visits)
+        return int(np.argmax(q + u))
+
+    def _backup(self, path, value):
+        """value is for the side to move at the leaf; undo the virtual loss on the way up"""
+        virtual_loss = self.virtual_loss
+        for node, i in reversed(path):
+            value = -value
+            node.visits[i] += 1 - virtual_loss
+            node.values[i] += value + virtual_loss
+
+    def _simulate_batch(self, root, count):
+        pending = []
+        for _ in range(count):
+            node, path = root, []
+            while node.terminal_value is None and node.expanded:
+                i = self._select(node)
+                path.append((node, i))
+                node.visits[i] += self.virtual_loss
+                node.values[i] -= self.virtual_loss
+                node = self._child(node, i)
+            if node.terminal_value is not None:
+                self._backup(path, node.terminal_value)
+            else:
+                pending.append((node, path))
+        if pending:
+            unique = list({id(node): node for node, _ in pending}.values())
+            self._evaluate(unique)
+            for node, path in pending:
+                self._backup(path, node.value)
+
+    def search(self, board, player=None):
+        """Run a search from `board` and return the root node"""
+        board = tuple(int(cell) for cell in board)
+        if 0 not in board:
+            raise ValueError("Cannot search a full board: the game is over")
+        game = self._game
+        game.board = list(board)
+        if game.check_win(1) or game.check_win(-1):
+            raise ValueError("Cannot search a board on which the game is already won")
+        if player is None:
+            player = 1 if sum(1 for cell in board if cell != 0) % 2 == 0 else -1
+        root = self._find_root(board, player)
+        start = time.perf_counter()
+        deadline = start + self.time_limit_ms / 1000 if self.time_limit_ms is not None else None
+        if not root.expanded:
+            self._evaluate([root])
+
+        simulations = 0
+        while self.num_simulations is None or simulations < self.num_simulations:
+            count = self.batch_size
+            if self.num_simulations is not None:
+                count = min(count, self.num_simulations - simulations)
+            self._simulate_batch(root, count)
+            simulations += count
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        self.last_search = {
+            'simulations': simulations,
+            'elapsed_ms': (time.perf_counter() - start) * 1000,
+            'root_visits': int(root.visits.sum()),
+            'table_size': len(self.table) if self.table is not None else None
+        }
+        return root
+
+    def action_visits(self, board):
+        """Visit count per cell after searching `board`"""
+        root = self.search(board)
+        visits = np.zeros(len(root.board))
+        visits[root.actions] = root.visits
+        return visits
+
+    def choose_action(self, state, available_actions):
+        root = self.search(state)
+        # Most visited move, prior as tie-break
+        i = int(np.lexsort((root.priors, root.visits))[-1])
+        action = int(root.actions[i])
+        if action not in available_actions:
+            action = list(available_actions)[0]
+        self.root = root.children[i]  # Reused when the opponent's reply is searched
+        return action
+
+    def choose_actions(self, states, legal_masks, epsilon=None):
+        """One search per board; the tree is only shared through the transposition table"""
+        legal_masks = np.asarray(legal_masks, dtype=bool)
+        actions = np.empty(len(legal_masks), dtype=np.int64)
+        for n, (state, legal) in enumerate(zip(states, legal_masks)):
+            self.root = None
+            actions[n] = self.choose_action(state, np.flatnonzero(legal).tolist())
+        return actions
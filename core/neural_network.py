@@ -3,7 +3,13 @@ import torch.nn as nn
 import torch.optim as optim
 import numpy as np
 import random
-from collections import deque
+import copy
+import warnings
+
+from core.replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+from core.bitboard import canonicalize, player_to_move, symmetric_transitions
+from utils.checkpoint import atomic_save
+from utils.profiler import profiled, section
 
 class TicTacToeNet(nn.Module):
     def __init__(self, input_size=9, hidden_size=32, output_size=9):  # Smaller network
@@ -19,74 +25,357 @@ class TicTacToeNet(nn.Module):
     def forward(self, x):
         return self.network(x)
 
+class ConvTicTacToeNet(nn.Module):
+    """Fully convolutional net over a 2-plane (own / opponent pieces) encoding
+    
+    Takes the same flat +1/-1 board as TicTacToeNet and returns one Q-value
+    per cell from a 1x1 convolution, so the weights do not depend on the
+    board size.
+    """
+    def __init__(self, rows=3, cols=3, channels=32):
+        super(ConvTicTacToeNet, self).__init__()
+        self.rows = rows
+        self.cols = cols
+        self.network = nn.Sequential(
+            nn.Conv2d(2, channels, kernel_size=3, padding=1),
+            nn.Tanh(),
+            nn.Conv2d(channels, channels, kernel_size=3, padding=1),
+            nn.Tanh(),
+            nn.Conv2d(channels, 1, kernel_size=1)
+        )
+    
+    def forward(self, x):
+        boards = x.reshape(-1, 1, self.rows, self.cols)
+        planes = torch.cat([(boards > 0).to(x.dtype), (boards < 0).to(x.dtype)], dim=1)
+        return self.network(planes).reshape(x.shape)
+
+class DuelingTicTacToeNet(nn.Module):
+    """MLP trunk with separate state-value and move-advantage heads"""
+    def __init__(self, input_size=9, hidden_size=32, output_size=9):
+        super(DuelingTicTacToeNet, self).__init__()
+        self.trunk = nn.Sequential(
+            nn.Linear(input_size, hidden_size),
+            nn.Tanh(),
+            nn.Linear(hidden_size, hidden_size),
+            nn.Tanh()
+        )
+        self.value = nn.Linear(hidden_size, 1)
+        self.advantage = nn.Linear(hidden_size, output_size)
+    
+    def forward(self, x):
+        features = self.trunk(x)
+        advantage = self.advantage(features)
+        return self.value(features) + advantage - advantage.mean(-1, keepdim=True)
+
+# Architecture name -> builder(rows, cols, hidden_size)
+MODEL_REGISTRY = {}
+
+def register_model(name):
+    def decorator(builder):
+        MODEL_REGISTRY[name] = builder
+        return builder
+    return decorator
+
+@register_model('mlp')
+def _build_mlp(rows, cols, hidden_size):
+    return TicTacToeNet(rows * cols, hidden_size, rows * cols)
+
+@register_model('conv')
+def _build_conv(rows, cols, hidden_size):
+    return ConvTicTacToeNet(rows, cols, hidden_size)
+
+@register_model('dueling')
+def _build_dueling(rows, cols, hidden_size):
+    return DuelingTicTacToeNet(rows * cols, hidden_size, rows * cols)
+
+def build_model(architecture, rows=3, cols=3, hidden_size=32):
+    if architecture not in MODEL_REGISTRY:
+        raise ValueError(f"Unknown architecture: {architecture} (choose from {', '.join(MODEL_REGISTRY)})")
+    return MODEL_REGISTRY[architecture](rows, cols, hidden_size)
+
+INFERENCE_DTYPES = ('float32', 'bfloat16', 'int8')
+
+def resolve_device(device):
+    """'auto' picks CUDA when available, anything else is passed to torch.device"""
+    if device == 'auto':
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    return torch.device(device)
+
 class TicTacToeAI:
-    def __init__(self, learning_rate=0.0001):  # Much smaller learning rate
-        self.model = TicTacToeNet()
-        self.optimizer = optim.Adam(self.model.parameters(), lr=learning_rate)
-        self.memory = deque(maxlen=2000)  # Smaller memory
+    def __init__(self, learning_rate=0.0001, memory_size=2000, prioritized=False,
+                 per_alpha=0.6, per_beta=0.4, target_update=None, target_sync_interval=100,
+                 tau=0.005, double_dqn=False, augment=None, rows=3, cols=3, k=3,
+                 hidden_size=32, architecture='mlp', device='cpu', num_threads=None,
+                 compile_model=False, inference_dtype='float32', gamma=0.9, epsilon_start=1.0,
+                 epsilon_min=0.3, epsilon_decay=0.999):  # Much smaller learning rate
+        # Deployment options: training always runs in float32 on `device`;
+        # inference_dtype selects a bfloat16 or int8 dynamic-quantized copy
+        # of the network for choose_action(s) and q_values
+        if inference_dtype not in INFERENCE_DTYPES:
+            raise ValueError(f"Unknown inference dtype: {inference_dtype}")
+        self.device = resolve_device(device)
+        self.num_threads = num_threads
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.compile_model = compile_model
+        self.inference_dtype = inference_dtype
+        
+        # Board the network is built for: rows x cols cells, k in a row to win
+        self.prioritized = prioritized
+        self.per_alpha = per_alpha
+        self.per_beta = per_beta
+        self._build_network(rows, cols, k, hidden_size, architecture, learning_rate, memory_size)
         
         # Stable epsilon management
-        self.epsilon = 1.0
-        self.epsilon_min = 0.3  # Higher minimum
-        self.epsilon_decay = 0.999
-        self.gamma = 0.9
+        self.epsilon = epsilon_start
+        self.epsilon_min = epsilon_min  # Higher minimum
+        self.epsilon_decay = epsilon_decay
+        self.gamma = gamma
         
-        self.loss_fn = nn.SmoothL1Loss()  # Huber loss - more stable than MSE
+        # Huber loss - more stable than MSE. Kept per-sample so PER can weight it
+        self.loss_fn = nn.SmoothL1Loss(reduction='none')
         self.training_steps = 0
+        
+        # Target network: None (bootstrap from self.model), 'hard' (copy every
+        # target_sync_interval steps) or 'soft' (Polyak averaging with tau)
+        self.target_update = target_update
+        self.target_sync_interval = target_sync_interval
+        self.tau = tau
+        self.double_dqn = double_dqn  # Online net picks the next action, target net scores it
+        self.target_model = None
+        self._init_target_model()
+        
+        # Symmetry augmentation: None, 'symmetries' (store all 8 symmetric
+        # variants of each transition) or 'canonical' (map every board to its
+        # canonical variant for both acting and learning)
+        if augment not in (None, 'symmetries', 'canonical'):
+            raise ValueError(f"Unknown augment mode: {augment}")
+        if augment is not None and (rows, cols) != (3, 3):
+            raise ValueError("Symmetry augmentation is only available on the 3x3 board")
+        self.augment = augment
+        
+        # Optional object with a phase(name) context manager (e.g. TrainingMonitor)
+        # that times the sampling / forward / backward parts of replay. Without
+        # one the phases are still reported to an active utils.profiler.Profiler
+        self.phase_timer = None
+    
+    def _new_memory(self, capacity):
+        if self.prioritized:
+            return PrioritizedReplayBuffer(capacity, self.board_size, alpha=self.per_alpha, beta=self.per_beta)
+        return ReplayBuffer(capacity, self.board_size)
+    
+    def _build_network(self, rows, cols, k, hidden_size, architecture, learning_rate, memory_size):
+        """(Re)build the network, optimizer and replay buffer for a board size and architecture"""
+        self.rows, self.cols, self.k = rows, cols, k
+        self.board_size = rows * cols
+        self.hidden_size = hidden_size
+        self.architecture = architecture
+        self.model = build_model(architecture, rows, cols, hidden_size).to(self.device)
+        self.optimizer = optim.Adam(self.model.parameters(), lr=learning_rate)
+        self.memory = self._new_memory(memory_size)
+        self._set_deployment()
+    
+    def _set_deployment(self):
+        # Training forward passes go through the compiled module when enabled;
+        # self.model stays the plain module so state_dict keys are unchanged
+        self.train_model = torch.compile(self.model, dynamic=True) if self.compile_model else self.model
+        self._inference_model = None
+        self._inference_key = None
+    
+    def _inference_network(self):
+        """Network used for acting, rebuilt lazily after training steps for bfloat16 / int8"""
+        if self.inference_dtype == 'float32':
+            return self.train_model
+        key = (self.inference_dtype, self.training_steps)
+        if self._inference_model is None or self._inference_key != key:
+            model = copy.deepcopy(self.model).eval()
+            if self.inference_dtype == 'bfloat16':
+                model = model.to(torch.bfloat16)
+            else:
+                # Dynamic quantization runs on the CPU and covers the Linear layers only
+                if any(isinstance(module, nn.Conv2d) for module in model.modules()):
+                    warnings.warn(f"int8 inference quantizes Linear layers only; the convolutions of the "
+                                  f"'{self.architecture}' network stay float32", stacklevel=3)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    model = torch.ao.quantization.quantize_dynamic(model.cpu(), {nn.Linear}, dtype=torch.qint8)
+            self._inference_model = model
+            self._inference_key = key
+        return self._inference_model
+    
+    def _infer(self, states):
+        """Q-values for a float32 (N, cells) tensor of mover-perspective boards, as float32 on the CPU"""
+        model = self._inference_network()
+        if self.inference_dtype == 'int8':
+            states = states.cpu()
+        else:
+            states = states.to(self.device, torch.bfloat16 if self.inference_dtype == 'bfloat16' else torch.float32)
+        with torch.no_grad():
+            return model(states).float().cpu()
     
+    def _phase(self, name):
+        return self.phase_timer.phase(name) if self.phase_timer is not None else section(name)
+    
+    @profiled()
     def choose_action(self, state, available_actions):
         if np.random.random() <= self.epsilon:
             return random.choice(available_actions)
         else:
-            state_tensor = self.get_state(state)
-            with torch.no_grad():
-                q_values = self.model(state_tensor)
+            if self.augment == 'canonical':
+                q_values = self._batch_q_values([state])[0]
+            else:
+                q_values = self._infer(self.get_state(state).unsqueeze(0))[0]
             
-            available_q_values = {action: q_values[action].item() for action in available_actions}
-            return max(available_q_values, key=available_q_values.get)
+            available_actions = list(available_actions)
+            return available_actions[int(q_values[available_actions].argmax())]
+    
+    def _batch_q_values(self, states):
+        perms = None
+        if self.augment == 'canonical':
+            states, perms = canonicalize(states)
+        states = torch.as_tensor(np.asarray(states), dtype=torch.float32)
+        # Same encoding as get_state: each board seen by its side to move
+        movers = 1 - 2 * ((states != 0).sum(1) % 2).float()
+        q_values = self._infer(states * movers.unsqueeze(1))
+        if perms is not None:
+            # Move the Q-value of canonical cell i back to original cell perms[i]
+            q_values = torch.empty_like(q_values).scatter_(1, torch.from_numpy(perms), q_values)
+        return q_values
+    
+    def q_values(self, states):
+        """Q-values for an (N, 9) batch of boards as an (N, 9) NumPy array"""
+        return self._batch_q_values(states).numpy()
+    
+    @profiled()
+    def choose_actions(self, states, legal_masks, epsilon=None):
+        """Epsilon-greedy actions for an (N, 9) batch of boards in one forward pass
+        
+        legal_masks is a boolean (N, 9) array of playable cells. Pass epsilon=0
+        for pure greedy play; by default the current exploration rate is used.
+        Returns a NumPy array of N actions.
+        """
+        epsilon = self.epsilon if epsilon is None else epsilon
+        legal_masks = torch.as_tensor(np.asarray(legal_masks, dtype=bool))
+        q_values = self._batch_q_values(states)
+        actions = q_values.masked_fill(~legal_masks, float('-inf')).argmax(1)
+        
+        if epsilon > 0:
+            # Uniform random legal move: argmax of random scores over legal cells
+            random_actions = torch.rand(legal_masks.shape).masked_fill(~legal_masks, -1).argmax(1)
+            explore = torch.rand(len(actions)) < epsilon
+            actions = torch.where(explore, random_actions, actions)
+        return actions.numpy()
+    
+    def _init_target_model(self):
+        if self.target_update not in (None, 'hard', 'soft'):
+            raise ValueError(f"Unknown target_update mode: {self.target_update}")
+        if self.target_update is None:
+            self.target_model = None
+        else:
+            self.target_model = copy.deepcopy(self.model)
+            self.target_model.requires_grad_(False)
     
+    def _update_target_model(self):
+        if self.target_update == 'hard':
+            if self.training_steps % self.target_sync_interval == 0:
+                self.target_model.load_state_dict(self.model.state_dict())
+        elif self.target_update == 'soft':
+            with torch.no_grad():
+                for target_param, param in zip(self.target_model.parameters(), self.model.parameters()):
+                    target_param.lerp_(param, self.tau)
+    
+    def weights_updated(self):
+        """Call after changing self.model outside replay (e.g. supervised pretraining):
+        resyncs the target network and drops the cached reduced-precision copy"""
+        if self.target_model is not None:
+            self.target_model.load_state_dict(self.model.state_dict())
+        self._inference_model = None
+
     def get_state(self, board):
-        return torch.FloatTensor(board)
+        """Board from the perspective of the side to move: own pieces +1, opponent -1"""
+        return torch.FloatTensor(board) * player_to_move(board)
     
+    @profiled()
     def remember(self, state, action, reward, next_state, done):
-        if action >= 0 and action < 9:
-            self.memory.append((state, action, reward, next_state, done))
+        """Store a transition; `reward` is from the perspective of the player who moved"""
+        if action >= 0 and action < self.board_size:
+            mover = player_to_move(state)
+            state = np.asarray(state, dtype=np.int8)
+            next_state = state if next_state is None else np.asarray(next_state, dtype=np.int8)
+            
+            if self.augment == 'symmetries':
+                transitions = symmetric_transitions(state, action, next_state)
+            elif self.augment == 'canonical':
+                # State and next state are canonicalized independently: the
+                # bootstrap max over legal moves does not depend on orientation
+                (canonical_state,), (perm,) = canonicalize([state])
+                (canonical_next,), _ = canonicalize([next_state])
+                transitions = [(canonical_state, int(np.argmax(perm == action)), canonical_next)]
+            else:
+                transitions = [(state, action, next_state)]
+            
+            for state, action, next_state in transitions:
+                # The opponent moves next, so flip next_state to their perspective
+                self.memory.add(state * mover, action, reward, next_state * -mover, done)
     
+    @profiled()
     def replay(self, batch_size=32):
         if len(self.memory) < batch_size:
             return None
         
-        batch = random.sample(self.memory, batch_size)
-        states = torch.FloatTensor([exp[0] for exp in batch])
-        actions = torch.LongTensor([exp[1] for exp in batch])
-        rewards = torch.FloatTensor([exp[2] for exp in batch])
-        next_states = torch.FloatTensor([exp[3] for exp in batch])
-        dones = torch.BoolTensor([exp[4] for exp in batch])
+        with self._phase('sampling'):
+            indices = self.memory.sample_indices(batch_size)
+            batch = (tensor.to(self.device) for tensor in self.memory.get_batch(indices))
+            states, actions, rewards, next_states, dones, legal_masks = batch
+            states = states.float()
+            next_states = next_states.float()
         
-        # Current Q values
-        current_q_values = self.model(states).gather(1, actions.unsqueeze(1))
+        with self._phase('forward'):
+            # Current Q values
+            current_q_values = self.train_model(states).gather(1, actions.unsqueeze(1))
         
-        # Next Q values - with target clamping
-        with torch.no_grad():
-            next_q_values = self.model(next_states).max(1)[0]
-            target_q_values = rewards + (self.gamma * next_q_values * ~dones)
+            # Next Q values - with target clamping
+            with torch.no_grad():
+                # Negamax bootstrap: next_states are seen from the opponent's side, so
+                # their best legal move is worth -value to us. Occupied cells never count.
+                target_model = self.target_model if self.target_model is not None else self.train_model
+                next_q_all = target_model(next_states).masked_fill(~legal_masks, -1e9)
+                if self.double_dqn:
+                    online_q = self.train_model(next_states).masked_fill(~legal_masks, -1e9)
+                    next_actions = online_q.argmax(1, keepdim=True)
+                    next_q_values = next_q_all.gather(1, next_actions).squeeze(1)
+                else:
+                    next_q_values = next_q_all.max(1)[0]
+                next_q_values = torch.where(dones, torch.zeros_like(next_q_values), next_q_values)
+                target_q_values = rewards - self.gamma * next_q_values
             
-            # CRITICAL: Clamp targets to prevent explosion
-            target_q_values = torch.clamp(target_q_values, -10, 10)
+                # CRITICAL: Clamp targets to prevent explosion
+                target_q_values = torch.clamp(target_q_values, -10, 10)
         
-        # Calculate loss with Huber loss
-        loss = self.loss_fn(current_q_values.squeeze(), target_q_values)
+            # Calculate loss with Huber loss
+            current_q_values = current_q_values.squeeze(1)
+            losses = self.loss_fn(current_q_values, target_q_values)
+            if self.prioritized:
+                weights = torch.from_numpy(self.memory.importance_weights(indices)).to(self.device)
+                loss = (losses * weights).mean()
+                td_errors = (target_q_values - current_q_values).detach().cpu().numpy()
+                self.memory.update_priorities(indices, td_errors)
+            else:
+                loss = losses.mean()
         
-        # Update network with gradient clipping
-        self.optimizer.zero_grad()
-        loss.backward()
+        with self._phase('backward'):
+            # Update network with gradient clipping
+            self.optimizer.zero_grad()
+            loss.backward()
         
-        # CRITICAL: Gradient clipping to prevent explosion
-        torch.nn.utils.clip_grad_value_(self.model.parameters(), 1.0)
+            # CRITICAL: Gradient clipping to prevent explosion
+            torch.nn.utils.clip_grad_value_(self.model.parameters(), 1.0)
         
-        self.optimizer.step()
+            self.optimizer.step()
         
         self.training_steps += 1
+        if self.target_model is not None:
+            self._update_target_model()
         
         # Gentle epsilon decay
         if self.epsilon > self.epsilon_min:
@@ -94,17 +383,89 @@ class TicTacToeAI:
         
         return loss.item()
     
-    def save_model(self, filepath):
-        torch.save({
+    def save_model(self, filepath, include_memory=True):
+        """Write the checkpoint atomically: readers never see a half-written file"""
+        atomic_save(self.checkpoint_dict(include_memory), filepath)
+    
+    def checkpoint_dict(self, include_memory=True):
+        checkpoint = {
             'model_state_dict': self.model.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
             'epsilon': self.epsilon,
-            'training_steps': self.training_steps
-        }, filepath)
+            'training_steps': self.training_steps,
+            'hyperparameters': {
+                'gamma': self.gamma,
+                'epsilon_min': self.epsilon_min,
+                'epsilon_decay': self.epsilon_decay
+            },
+            'target_config': {
+                'target_update': self.target_update,
+                'target_sync_interval': self.target_sync_interval,
+                'tau': self.tau,
+                'double_dqn': self.double_dqn
+            },
+            'augment': self.augment,
+            'board_config': {'rows': self.rows, 'cols': self.cols, 'k': self.k},
+            'network_config': {'architecture': self.architecture, 'hidden_size': self.hidden_size},
+            'deployment_config': {
+                'device': str(self.device),
+                'num_threads': self.num_threads,
+                'compile_model': self.compile_model,
+                'inference_dtype': self.inference_dtype
+            }
+        }
+        if self.target_model is not None:
+            checkpoint['target_model_state_dict'] = self.target_model.state_dict()
+        if include_memory:
+            checkpoint['memory_state_dict'] = self.memory.state_dict()
+        return checkpoint
     
-    def load_model(self, filepath):
-        checkpoint = torch.load(filepath)
+    def load_model(self, filepath, map_location='cpu', weights_only=True, inference_only=False):
+        """Load a checkpoint, rebuilding the network if its board or architecture differ
+        
+        The compile / inference dtype settings stored with the model are
+        restored; device and thread count stay those of this instance.
+        weights_only refuses checkpoints that would need arbitrary unpickling.
+        With inference_only the file is memory-mapped and the optimizer,
+        target network and replay buffer are skipped, which is all a
+        player or server needs. Returns the loaded checkpoint dict.
+        """
+        checkpoint = torch.load(filepath, map_location=map_location, weights_only=weights_only,
+                                mmap=inference_only)
+        # Checkpoints without a board / network config are 3x3 with the default MLP
+        board_config = checkpoint.get('board_config', {'rows': 3, 'cols': 3, 'k': 3})
+        network_config = checkpoint.get('network_config', {})
+        shape = (board_config['rows'], board_config['cols'], board_config['k'],
+                 network_config.get('hidden_size', 32), network_config.get('architecture', 'mlp'))
+        if shape != (self.rows, self.cols, self.k, self.hidden_size, self.architecture):
+            learning_rate = self.optimizer.param_groups[0]['lr']
+            self._build_network(*shape, learning_rate, self.memory.capacity)
+        deployment_config = checkpoint.get('deployment_config', {})
+        self.compile_model = deployment_config.get('compile_model', self.compile_model)
+        self.inference_dtype = deployment_config.get('inference_dtype', self.inference_dtype)
+        self._set_deployment()
         self.model.load_state_dict(checkpoint['model_state_dict'])
-        self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        if not inference_only:
+            self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
         self.epsilon = checkpoint['epsilon']
-        self.training_steps = checkpoint.get('training_steps', 0)
\ No newline at end of file
+        hyperparameters = checkpoint.get('hyperparameters', {})
+        self.gamma = hyperparameters.get('gamma', self.gamma)
+        self.epsilon_min = hyperparameters.get('epsilon_min', self.epsilon_min)
+        self.epsilon_decay = hyperparameters.get('epsilon_decay', self.epsilon_decay)
+        self.training_steps = checkpoint.get('training_steps', 0)
+        
+        target_config = checkpoint.get('target_config')
+        if target_config is not None:
+            self.target_update = target_config['target_update']
+            self.target_sync_interval = target_config['target_sync_interval']
+            self.tau = target_config['tau']
+            self.double_dqn = target_config['double_dqn']
+        self._init_target_model()  # Starts as a copy of the loaded model
+        self.augment = checkpoint.get('augment', self.augment)
+        if inference_only:
+            return checkpoint
+        if self.target_model is not None and 'target_model_state_dict' in checkpoint:
+            self.target_model.load_state_dict(checkpoint['target_model_state_dict'])
+        if 'memory_state_dict' in checkpoint:
+            self.memory.load_state_dict(checkpoint['memory_state_dict'])
+        return checkpoint
\ No newline at end of file
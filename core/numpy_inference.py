@@ -0,0 +1,88 @@
+import random
+import numpy as np
+
+from core.bitboard import canonicalize
+from core.game_environment import board_shape
+
+# Torch-free inference for TicTacToeNet. Weights are exported from a trained
+# TicTacToeAI to a small .npz file that loads in a few milliseconds.
+NUMPY_MODEL_PATH = "tictactoe_ai.npz"
+
+
+def export_numpy_weights(ai, filepath=NUMPY_MODEL_PATH):
+    """Save the network weights (and current epsilon) as plain NumPy arrays"""
+    if getattr(ai, 'architecture', 'mlp') != 'mlp':
+        raise ValueError("NumPy export is only available for the 'mlp' architecture")
+    arrays = {name: tensor.detach().cpu().numpy() for name, tensor in ai.model.state_dict().items()}
+    canonical = np.bool_(getattr(ai, 'augment', None) == 'canonical')
+    shape = np.array(board_shape(ai), dtype=np.int64)
+    np.savez(filepath, epsilon=np.float32(ai.epsilon), canonical=canonical, board_config=shape, **arrays)
+
+
+class NumpyTicTacToeNet:
+    """Forward pass of the TicTacToeNet MLP (Linear -> Tanh -> ... -> Linear) in NumPy"""
+    def __init__(self, weights):
+        layer_ids = sorted(int(name.split('.')[1]) for name in weights if name.endswith('.weight'))
+        self.layers = [
+            (weights[f'network.{i}.weight'].T.astype(np.float32), weights[f'network.{i}.bias'].astype(np.float32))
+            for i in layer_ids
+        ]
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        for weight, bias in self.layers[:-1]:
+            x = np.tanh(x @ weight + bias)
+        weight, bias = self.layers[-1]
+        return x @ weight + bias
+
+
+class NumpyTicTacToeAI:
+    """Inference-only stand-in for TicTacToeAI that never imports torch"""
+    def __init__(self, filepath=NUMPY_MODEL_PATH):
+        with np.load(filepath) as data:
+            weights = {name: data[name] for name in data.files if name.startswith('network.')}
+            self.epsilon = float(data['epsilon']) if 'epsilon' in data.files else 0.0
+            # Trained with augment='canonical': the network only knows canonical boards
+            self.canonical = bool(data['canonical']) if 'canonical' in data.files else False
+            shape = data['board_config'] if 'board_config' in data.files else (3, 3, 3)
+        self.rows, self.cols, self.k = (int(value) for value in shape)
+        self.board_size = self.rows * self.cols
+        self.model = NumpyTicTacToeNet(weights)
+
+    def get_state(self, board):
+        """Board from the perspective of the side to move, as in TicTacToeAI"""
+        board = np.asarray(board, dtype=np.float32)
+        return board if np.count_nonzero(board) % 2 == 0 else -board
+
+    def q_values(self, states):
+        perms = None
+        if self.canonical:
+            states, perms = canonicalize(states)
+        states = np.asarray(states, dtype=np.float32)
+        movers = 1 - 2 * (np.count_nonzero(states, axis=1) % 2)
+        q_values = self.model(states * movers[:, None])
+        if perms is not None:
+            original = np.empty_like(q_values)
+            np.put_along_axis(original, perms, q_values, axis=1)
+            q_values = original
+        return q_values
+
+    def choose_action(self, state, available_actions):
+        if np.random.random() <= self.epsilon:
+            return random.choice(available_actions)
+        if self.canonical:
+            q_values = self.q_values([state])[0]
+        else:
+            q_values = self.model(self.get_state(state))
+        available_actions = list(available_actions)
+        return available_actions[int(q_values[available_actions].argmax())]
+
+    def choose_actions(self, states, legal_masks, epsilon=None):
+        epsilon = self.epsilon if epsilon is None else epsilon
+        legal_masks = np.asarray(legal_masks, dtype=bool)
+        actions = np.where(legal_masks, self.q_values(states), -np.inf).argmax(axis=1)
+        if epsilon > 0:
+            random_actions = (np.random.random(legal_masks.shape) * legal_masks).argmax(axis=1)
+            explore = np.random.random(len(actions)) < epsilon
+            actions = np.where(explore, random_actions, actions)
+        return actions
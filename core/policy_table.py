@@ -0,0 +1,74 @@
+import random
+import numpy as np
+
+from core.bitboard import (
+    BOARDS, LEGAL_MASK, NUM_POSITIONS, WINNER,
+    encode, encode_batch, reachable_positions
+)
+from core.game_environment import board_shape
+
+# Deliberately torch-free: serving moves from an exported table only needs NumPy.
+POLICY_TABLE_PATH = "tictactoe_policy.npz"
+
+
+def export_policy_table(ai, filepath=POLICY_TABLE_PATH):
+    """Evaluate the network on every playable position in one batch and save the result
+    
+    Stores, indexed by base-3 position, the greedy move (-1 where there is no
+    move to make) and a row into a float16 table of Q-vectors.
+    """
+    if board_shape(ai) != (3, 3, 3):
+        raise ValueError("Policy tables are only available for the 3x3 board")
+    positions = reachable_positions()
+    positions = positions[(WINNER[positions] == 0) & (LEGAL_MASK[positions] != 0)]
+    boards = BOARDS[positions]
+    
+    q_values = ai.q_values(boards)
+    greedy = np.where(boards == 0, q_values, -np.inf).argmax(axis=1)
+    
+    moves = np.full(NUM_POSITIONS, -1, dtype=np.int8)
+    moves[positions] = greedy
+    rows = np.full(NUM_POSITIONS, -1, dtype=np.int16)
+    rows[positions] = np.arange(len(positions))
+    
+    np.savez_compressed(filepath, moves=moves, rows=rows, q_values=q_values.astype(np.float16))
+    return len(positions)
+
+
+class TablePolicy:
+    """Greedy policy served from an exported table, with the TicTacToeAI interface"""
+    def __init__(self, filepath=POLICY_TABLE_PATH):
+        with np.load(filepath) as data:
+            self.moves = data['moves']
+            self.rows = data['rows']
+            self.table_q_values = data['q_values']
+        self._moves = self.moves.tolist()
+        self.epsilon = 0.0  # Never explores
+    
+    def q_values(self, states):
+        """Q-values for an (N, 9) batch of boards (zeros for positions not in the table)"""
+        rows = self.rows[encode_batch(states)]
+        q_values = self.table_q_values[np.maximum(rows, 0)].astype(np.float32)
+        q_values[rows < 0] = 0
+        return q_values
+    
+    def choose_action(self, state, available_actions):
+        action = self._moves[encode(state)]
+        if action in available_actions:
+            return action
+        # Position not in the table (e.g. a hand-made board): fall back to random
+        return random.choice(list(available_actions))
+    
+    def choose_actions(self, states, legal_masks, epsilon=0):
+        """Table moves for an (N, 9) batch; illegal or missing entries get a random legal move"""
+        states = np.asarray(states)
+        legal_masks = np.asarray(legal_masks, dtype=bool)
+        actions = self.moves[encode_batch(states)].astype(np.int64)
+        
+        rows = np.arange(len(actions))
+        valid = (actions >= 0) & legal_masks[rows, np.maximum(actions, 0)]
+        explore = ~valid | (np.random.random(len(actions)) < epsilon)
+        if explore.any():
+            scores = np.random.random(legal_masks.shape) * legal_masks
+            actions[explore] = scores[explore].argmax(axis=1)
+        return actions
@@ -0,0 +1,185 @@
+import sys
+import os
+import json
+import time
+import argparse
+import numpy as np
+import torch
+import torch.nn.functional as F
+from termcolor import cprint
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bitboard import BOARDS, LEGAL_ACTIONS, WINNER_LIST, play, player_to_move, reachable_positions
+from core.game_environment import WIN_REWARD, DRAW_REWARD
+from core.neural_network import MODEL_REGISTRY, TicTacToeAI
+from core.solver import get_solver
+
+DATASET_DIR = "pretrain_data"
+DATASET_ARRAYS = ('states', 'q_targets', 'legal_masks', 'best_masks')
+
+
+def discounted_q_values(gamma=0.9):
+    """Exact Q-values of every cell for every reachable, unfinished 3x3 position
+
+    These are the fixed point of the replay target in TicTacToeAI.replay:
+    a winning move is worth WIN_REWARD, a move that fills the board
+    DRAW_REWARD, and any other move -gamma times the best Q-value of the
+    opponent in the resulting position. Returns (positions, q_values) with
+    q_values[i, cell] = -inf on occupied cells.
+    """
+    positions = [index for index in reachable_positions().tolist()
+                 if WINNER_LIST[index] == 0 and LEGAL_ACTIONS[index]]
+    # Children have one more piece, so solve the fullest boards first
+    positions.sort(key=lambda index: -int(np.count_nonzero(BOARDS[index])))
+    best = {}
+    q_values = {}
+    for index in positions:
+        player = player_to_move(BOARDS[index])
+        q = np.full(9, -np.inf)
+        for action in LEGAL_ACTIONS[index]:
+            child = play(index, action, player)
+            if WINNER_LIST[child] != 0:
+                q[action] = WIN_REWARD
+            elif not LEGAL_ACTIONS[child]:
+                q[action] = DRAW_REWARD
+            else:
+                q[action] = -gamma * best[child]
+        q_values[index] = q
+        best[index] = q.max()
+    positions.sort()
+    return np.array(positions, dtype=np.int64), np.array([q_values[index] for index in positions])
+
+
+def build_dataset(directory=DATASET_DIR, gamma=0.9, teacher=None):
+    """Label every reachable position and write the arrays as .npy files
+
+    Labels are the exact discounted Q-values, or with a `teacher` (anything
+    with q_values(boards), e.g. a bigger TicTacToeAI) the teacher's Q-values
+    for distillation. best_masks always holds the solver's optimal moves.
+    States are stored from the side to move, as the network sees them.
+    """
+    start = time.perf_counter()
+    positions, q_values = discounted_q_values(gamma)
+    boards = BOARDS[positions]
+    legal_masks = boards == 0
+    if teacher is not None:
+        q_values = np.asarray(teacher.q_values(boards), dtype=np.float64)
+    movers = np.where(np.count_nonzero(boards, axis=1) % 2 == 0, 1, -1).astype(np.int8)
+    solver = get_solver()
+    best_masks = ((solver.best_masks[positions][:, None] >> np.arange(9)) & 1).astype(bool)
+
+    arrays = {
+        'states': boards * movers[:, None],
+        'q_targets': np.where(legal_masks, q_values, 0.0).astype(np.float32),
+        'legal_masks': legal_masks,
+        'best_masks': best_masks
+    }
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, name + ".npy"), array)
+    meta = {'size': len(positions), 'gamma': gamma, 'source': 'teacher' if teacher is not None else 'solver'}
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    cprint(f"Labeled {len(positions)} positions in {time.perf_counter() - start:.2f}s -> {directory}", "green")
+    return meta
+
+
+def load_dataset(directory=DATASET_DIR):
+    """(meta, arrays) with the arrays memory-mapped read-only"""
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode='r') for name in DATASET_ARRAYS}
+    return meta, arrays
+
+
+def optimal_move_accuracy(ai, arrays, chunk_size=8192):
+    """Share of positions where the greedy move is one of the solver's optimal moves"""
+    correct = 0
+    size = len(arrays['states'])
+    with torch.no_grad():
+        for begin in range(0, size, chunk_size):
+            states = torch.from_numpy(np.array(arrays['states'][begin:begin + chunk_size], dtype=np.float32))
+            legal = torch.from_numpy(np.array(arrays['legal_masks'][begin:begin + chunk_size]))
+            best = np.asarray(arrays['best_masks'][begin:begin + chunk_size])
+            actions = ai.model(states.to(ai.device)).cpu().masked_fill(~legal, float('-inf')).argmax(1).numpy()
+            correct += int(best[np.arange(len(actions)), actions].sum())
+    return correct / size
+
+
+def pretrain(ai=None, dataset_dir=DATASET_DIR, epochs=300, batch_size=512, learning_rate=3e-3,
+             save_path=None, epsilon=None):
+    """Fit the network to a labeled dataset with large mini-batches
+
+    Batches are gathered from the memory-mapped arrays, so the dataset never
+    has to fit in memory. The loss is the Huber loss of replay, on legal
+    cells only. Afterwards the AI explores at `epsilon` (its epsilon_min by
+    default) and is saved to save_path, if given, as a regular checkpoint.
+    """
+    ai = ai or TicTacToeAI()
+    if (ai.rows, ai.cols, ai.k) != (3, 3, 3):
+        raise ValueError("Pretraining needs solver labels, which exist for the 3x3 board only")
+    meta, arrays = load_dataset(dataset_dir)
+    if meta['source'] == 'solver' and abs(meta['gamma'] - ai.gamma) > 1e-9:
+        raise ValueError(f"Dataset labeled with gamma={meta['gamma']}, the AI uses gamma={ai.gamma}; rebuild it")
+
+    # A separate optimizer: the AI's own keeps its learning rate for RL fine-tuning
+    optimizer = torch.optim.Adam(ai.model.parameters(), lr=learning_rate)
+    size = meta['size']
+    cprint(f"Pretraining on {size} positions for {epochs} epochs...", "cyan", attrs=['bold'])
+    start = time.perf_counter()
+    for epoch in range(epochs):
+        order = np.random.permutation(size)
+        total_loss = 0.0
+        for begin in range(0, size, batch_size):
+            indices = np.sort(order[begin:begin + batch_size])  # Sorted reads from the memory map
+            states = torch.from_numpy(arrays['states'][indices].astype(np.float32)).to(ai.device)
+            targets = torch.from_numpy(arrays['q_targets'][indices]).to(ai.device)
+            legal = torch.from_numpy(arrays['legal_masks'][indices]).to(ai.device)
+
+            predictions = ai.train_model(states)
+            loss = F.smooth_l1_loss(predictions[legal], targets[legal])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item() * len(indices)
+
+        if epoch % 50 == 0 or epoch == epochs - 1:
+            cprint(f"Epoch {epoch}, Loss: {total_loss / size:.5f}, "
+                   f"Optimal moves: {optimal_move_accuracy(ai, arrays):.1%}", "yellow")
+
+    ai.weights_updated()
+    ai.epsilon = ai.epsilon_min if epsilon is None else epsilon
+    cprint(f"Pretraining finished in {time.perf_counter() - start:.1f}s", "green", attrs=['bold'])
+    if save_path:
+        ai.save_model(save_path)
+        cprint(f"Model saved as {save_path}", "green")
+    return ai
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supervised pretraining from solver-labeled positions")
+    parser.add_argument("--dataset", default=DATASET_DIR, help="directory of the .npy dataset")
+    parser.add_argument("--rebuild", action="store_true", help="relabel the dataset even if it exists")
+    parser.add_argument("--teacher", help="distill this checkpoint's Q-values instead of the solver's")
+    parser.add_argument("--save-path", default="tictactoe_ai.pth")
+    parser.add_argument("--architecture", choices=sorted(MODEL_REGISTRY), default="mlp")
+    parser.add_argument("--hidden-size", type=int, default=32)
+    parser.add_argument("--gamma", type=float, default=0.9)
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--learning-rate", type=float, default=3e-3)
+    args = parser.parse_args()
+
+    if args.rebuild or args.teacher or not os.path.exists(os.path.join(args.dataset, "meta.json")):
+        teacher = None
+        if args.teacher:
+            from utils.evaluation import load_player
+            teacher = load_player(args.teacher)
+        build_dataset(args.dataset, args.gamma, teacher)
+    ai = TicTacToeAI(architecture=args.architecture, hidden_size=args.hidden_size, gamma=args.gamma)
+    pretrain(ai, args.dataset, args.epochs, args.batch_size, args.learning_rate, args.save_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions stored in preallocated arrays"""
+    def __init__(self, capacity=2000, board_size=9):
+        self.capacity = capacity
+        self.board_size = board_size
+        self.states = np.zeros((capacity, board_size), dtype=np.int8)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, board_size), dtype=np.int8)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.legal_masks = np.zeros((capacity, board_size), dtype=bool)  # Legal moves in next_state
+        self.position = 0  # Next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done, legal_mask=None):
+        """Store one transition, overwriting the oldest when full"""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        if next_state is None:  # Illegal move: the board did not change
+            next_state = state
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.legal_masks[i] = self.next_states[i] == 0 if legal_mask is None else legal_mask
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def sample_indices(self, batch_size):
+        return np.random.randint(0, self.size, size=batch_size)
+
+    def sample(self, batch_size):
+        """Random batch as tensors: states, actions, rewards, next_states, dones, legal_masks"""
+        return self.get_batch(self.sample_indices(batch_size))
+
+    def get_batch(self, indices):
+        return (
+            torch.from_numpy(self.states[indices]),
+            torch.from_numpy(self.actions[indices]),
+            torch.from_numpy(self.rewards[indices]),
+            torch.from_numpy(self.next_states[indices]),
+            torch.from_numpy(self.dones[indices]),
+            torch.from_numpy(self.legal_masks[indices])
+        )
+
+    def state_dict(self):
+        """Filled part of the buffer as tensors, so checkpoints stay loadable with weights_only"""
+        n = self.size
+        return {
+            'position': self.position,
+            'size': n,
+            'states': torch.from_numpy(self.states[:n].copy()),
+            'actions': torch.from_numpy(self.actions[:n].copy()),
+            'rewards': torch.from_numpy(self.rewards[:n].copy()),
+            'next_states': torch.from_numpy(self.next_states[:n].copy()),
+            'dones': torch.from_numpy(self.dones[:n].copy()),
+            'legal_masks': torch.from_numpy(self.legal_masks[:n].copy())
+        }
+
+    def _restore_order(self, state):
+        """Saved slots oldest-first, keeping only the newest ones that fit
+
+        A full buffer of the same capacity keeps its slot layout, so sampled
+        indices refer to the same transitions as before saving.
+        """
+        n = state['size']
+        if n == self.capacity:
+            return np.arange(n)
+        order = (np.arange(n) + state['position']) % n if n else np.arange(0)
+        return order[-self.capacity:]
+
+    def load_state_dict(self, state):
+        """Restore transitions oldest-first, keeping the newest ones if capacity shrank"""
+        keep = self._restore_order(state)
+        n = len(keep)
+        self.states[:n] = state['states'].numpy()[keep]
+        self.actions[:n] = state['actions'].numpy()[keep]
+        self.rewards[:n] = state['rewards'].numpy()[keep]
+        self.next_states[:n] = state['next_states'].numpy()[keep]
+        self.dones[:n] = state['dones'].numpy()[keep]
+        self.legal_masks[:n] = state['legal_masks'].numpy()[keep]
+        self.size = n
+        self.position = state['position'] if n == state['size'] == self.capacity else n % self.capacity
+
+
+class SumTree:
+    """Binary tree of priorities where each node holds the sum of its children
+
+    Leaves live at [leaf_count, 2 * leaf_count) and the root at index 1, so
+    both updates and prefix-sum lookups are O(log n) and vectorized over a batch.
+    """
+    def __init__(self, capacity):
+        self.leaf_count = 1 << max(1, (capacity - 1).bit_length())
+        self.tree = np.zeros(2 * self.leaf_count, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[np.asarray(indices) + self.leaf_count]
+
+    def update(self, indices, priorities):
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_count
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes >> 1)
+        while True:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes >> 1)
+
+    def find(self, values):
+        """Leaf index whose cumulative priority range contains each value"""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaf_count:
+            left = 2 * nodes
+            left_sums = self.tree[left]
+            go_right = values >= left_sums
+            values = np.where(go_right, values - left_sums, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.leaf_count
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Replay buffer that samples transitions in proportion to their TD error"""
+    def __init__(self, capacity=2000, board_size=9, alpha=0.6, beta=0.4,
+                 beta_increment=0.001, priority_epsilon=1e-3):
+        super().__init__(capacity, board_size)
+        self.alpha = alpha  # 0 = uniform, 1 = fully proportional
+        self.beta = beta  # Importance-sampling correction, annealed to 1
+        self.beta_increment = beta_increment
+        self.priority_epsilon = priority_epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def add(self, state, action, reward, next_state, done, legal_mask=None):
+        # New transitions get the highest priority so they are replayed at least once
+        i = super().add(state, action, reward, next_state, done, legal_mask)
+        self.tree.update([i], self.max_priority ** self.alpha)
+        return i
+
+    def sample_indices(self, batch_size):
+        # Stratified sampling: one uniform draw from each of batch_size equal segments
+        segment = self.tree.total() / batch_size
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * segment
+        return np.minimum(self.tree.find(values), self.size - 1)
+
+    def importance_weights(self, indices):
+        """Normalized importance-sampling weights for sampled indices"""
+        probabilities = self.tree.get(indices) / self.tree.total()
+        weights = (self.size * probabilities) ** -self.beta
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return (weights / weights.max()).astype(np.float32)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors) + self.priority_epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def state_dict(self):
+        state = super().state_dict()
+        state['priorities'] = torch.from_numpy(self.tree.get(np.arange(self.size)))
+        state['max_priority'] = self.max_priority
+        state['beta'] = self.beta
+        return state
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        self.tree = SumTree(self.capacity)
+        if self.size == 0:
+            return
+        if 'priorities' in state:
+            keep = self._restore_order(state)
+            self.tree.update(np.arange(self.size), state['priorities'].numpy()[keep])
+            self.max_priority = state['max_priority']
+            self.beta = state['beta']
+        else:
+            self.tree.update(np.arange(self.size), self.max_priority ** self.alpha)
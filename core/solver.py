@@ -0,0 +1,163 @@
+import os
+import random
+import numpy as np
+
+from core.bitboard import (
+    CANONICAL, LEGAL_ACTIONS, MASK_ACTIONS, NUM_POSITIONS, WINNER_LIST,
+    decode, encode, encode_batch, play, player_to_move, reachable_positions
+)
+
+# Solved tables are cached per user rather than in the working directory;
+# TICTACTOE_SOLVER_CACHE overrides the location
+SOLVER_CACHE_PATH = os.environ.get("TICTACTOE_SOLVER_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "tictactoe", "tictactoe_solver.npz")
+
+# Transposition table entry flags
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+CANONICAL_LIST = CANONICAL.tolist()
+
+
+def negamax(index, player, alpha, beta, table):
+    """Game value of a position for `player` (the side to move): 1 win, 0 draw, -1 loss
+
+    Alpha-beta search over base-3 indices. `table` is a transposition table
+    keyed by canonical position, so all 8 symmetric variants share an entry.
+    With the full window (-1, 1) the returned value is always exact.
+    """
+    if WINNER_LIST[index] != 0:
+        return -1  # The previous move won
+    actions = LEGAL_ACTIONS[index]
+    if not actions:
+        return 0
+
+    key = CANONICAL_LIST[index]
+    entry = table.get(key)
+    if entry is not None:
+        value, flag = entry
+        if flag == EXACT:
+            return value
+        if flag == LOWER_BOUND:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    original_alpha = alpha
+    best = -2
+    for action in actions:
+        value = -negamax(play(index, action, player), -player, -beta, -alpha, table)
+        if value > best:
+            best = value
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+    if best <= original_alpha:
+        flag = UPPER_BOUND
+    elif best >= beta:
+        flag = LOWER_BOUND
+    else:
+        flag = EXACT
+    table[key] = (best, flag)
+    return best
+
+
+def solve_all():
+    """Solve every reachable position
+
+    Returns (values, best_masks), both indexed by base-3 position:
+    values[p] is the game value for the side to move and best_masks[p] is a
+    9-bit mask of the moves that achieve it. Unreachable positions are 0.
+    """
+    values = np.zeros(NUM_POSITIONS, dtype=np.int8)
+    best_masks = np.zeros(NUM_POSITIONS, dtype=np.int16)
+    table = {}
+
+    for index in reachable_positions().tolist():
+        player = player_to_move(decode(index))
+        values[index] = negamax(index, player, -1, 1, table)
+        if WINNER_LIST[index] != 0 or not LEGAL_ACTIONS[index]:
+            continue
+        mask = 0
+        for action in LEGAL_ACTIONS[index]:
+            child = play(index, action, player)
+            if -negamax(child, -player, -1, 1, table) == values[index]:
+                mask |= 1 << action
+        best_masks[index] = mask
+    return values, best_masks
+
+
+class TicTacToeSolver:
+    """Perfect-play reference: O(1) position values and optimal moves"""
+    def __init__(self, cache_path=SOLVER_CACHE_PATH):
+        self.cache_path = cache_path
+        if cache_path and os.path.exists(cache_path):
+            self._load(cache_path)
+        else:
+            self.values, self.best_masks = solve_all()
+            if cache_path:
+                self._save(cache_path)
+        self._values = self.values.tolist()
+        self._best_masks = self.best_masks.tolist()
+
+    def _load(self, cache_path):
+        try:
+            with np.load(cache_path) as data:
+                self.values = data['values']
+                self.best_masks = data['best_masks']
+            if self.values.shape != (NUM_POSITIONS,) or self.best_masks.shape != (NUM_POSITIONS,):
+                raise ValueError("unexpected table shape")
+        except (OSError, KeyError, ValueError):
+            # Stale or corrupted cache: solve again and overwrite it
+            self.values, self.best_masks = solve_all()
+            self._save(cache_path)
+
+    def _save(self, cache_path):
+        """Write the tables through a temporary file; an unwritable cache is skipped"""
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                np.savez(f, values=self.values, best_masks=self.best_masks)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def value(self, board):
+        """Game value for the side to move: 1 win, 0 draw, -1 loss"""
+        return self._values[encode(board)]
+
+    def best_moves(self, board):
+        """All moves that keep the game value"""
+        return MASK_ACTIONS[self._best_masks[encode(board)]]
+
+    def choose_action(self, state, available_actions):
+        best = [action for action in self.best_moves(state) if action in available_actions]
+        return random.choice(best or list(available_actions))
+
+    def choose_actions(self, states, legal_masks, epsilon=0):
+        """A random optimal move for each board of an (N, 9) batch"""
+        legal_masks = np.asarray(legal_masks, dtype=bool)
+        masks = self.best_masks[encode_batch(states)]
+        optimal = ((masks[:, None] >> np.arange(9)) & 1).astype(bool) & legal_masks
+        # Unknown positions (no optimal move recorded) fall back to any legal move
+        candidates = np.where(optimal.any(axis=1, keepdims=True), optimal, legal_masks)
+        if epsilon > 0:
+            explore = np.random.random(len(candidates)) < epsilon
+            candidates[explore] = legal_masks[explore]
+        return (np.random.random(candidates.shape) * candidates).argmax(axis=1)
+
+
+_solver = None
+
+
+def get_solver(cache_path=SOLVER_CACHE_PATH):
+    """Shared solver instance, solved or loaded on first use"""
+    global _solver
+    if _solver is None:
+        _solver = TicTacToeSolver(cache_path)
+    return _solver
@@ -1,49 +1,70 @@
 import sys
 import os
+import time
+import argparse
+import queue
+import random
+import numpy as np
+import torch
+import torch.multiprocessing as mp
 from termcolor import colored, cprint
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.neural_network import TicTacToeAI
-from core.game_environment import TicTacToeGame
+from core.neural_network import MODEL_REGISTRY, TicTacToeAI
+from core.game_environment import TicTacToeGame, mover_reward
+from utils.checkpoint import CheckpointManager
 from utils.monitor import TrainingMonitor
+from utils.profiler import Profiler
 
-def train_ai(episodes=1000, save_path="tictactoe_ai.pth"):
-    ai = TicTacToeAI()
-    monitor = TrainingMonitor()
+def train_ai(episodes=1000, save_path="tictactoe_ai.pth", prioritized=False,
+             target_update=None, double_dqn=False, augment=None, log_path=None, profiler=None,
+             rows=3, cols=3, k=3, architecture='mlp', device='cpu', learning_rate=0.0001,
+             memory_size=2000, gamma=0.9, epsilon_start=1.0, epsilon_min=0.3, epsilon_decay=0.999,
+             batch_size=16, replay_every=2, checkpoints=None, resume=False):
+    """Self-play training on a rows x cols board with k in a row to win
     
-    cprint("Starting AI training...", "cyan", attrs=['bold'])
+    A replay step of `batch_size` transitions runs every `replay_every`
+    moves. Pass a utils.profiler.Profiler to instrument the run, and a
+    utils.checkpoint.CheckpointManager to snapshot it periodically; with
+    resume the run continues from the latest snapshot, if there is one.
+    """
+    ai = TicTacToeAI(learning_rate=learning_rate, memory_size=memory_size, prioritized=prioritized,
+                     target_update=target_update, double_dqn=double_dqn, augment=augment,
+                     rows=rows, cols=cols, k=k, architecture=architecture, device=device, gamma=gamma,
+                     epsilon_start=epsilon_start, epsilon_min=epsilon_min, epsilon_decay=epsilon_decay)
+    monitor = TrainingMonitor(log_path=log_path)
+    start_episode = 0
+    if resume and checkpoints is not None:
+        start_episode = checkpoints.restore(ai, monitor)
+    ai.phase_timer = monitor
+    if profiler is not None:
+        profiler.start()
     
-    for episode in range(episodes):
-        game = TicTacToeGame()
+    if start_episode:
+        cprint(f"Resuming AI training at episode {start_episode}...", "cyan", attrs=['bold'])
+    else:
+        cprint("Starting AI training...", "cyan", attrs=['bold'])
+    
+    for episode in range(start_episode, episodes):
+        game = TicTacToeGame(ai.rows, ai.cols, ai.k)
         state = game.reset()
         total_loss = 0
         steps = 0
         
         while not game.done:
-            available_actions = game.get_available_actions()
-            action = ai.choose_action(state, available_actions)
-            next_state, reward, done = game.make_move(action)
-            
-            # SIMPLE REWARDS
-            if done:
-                if game.winner == 1:  # AI won
-                    reward = 3
-                elif game.winner == -1:  # AI lost
-                    reward = -5
-                else:  # Draw
-                    reward = 0.1
-            else:
-                reward = 0  # No reward for continuing
-            
-            reward = max(min(reward, 5), -5)
+            with monitor.phase('acting'):
+                available_actions = game._available_actions()
+                action = ai.choose_action(state, available_actions)
+                next_state, _, done = game.make_move(action)
+                reward = mover_reward(game)
             
             ai.remember(state, action, reward, next_state, done)
             state = next_state
             
             # Train less frequently
-            if steps % 2 == 0:
-                loss = ai.replay(batch_size=16)  # Smaller batch
+            if steps % replay_every == 0:
+                loss = ai.replay(batch_size=batch_size)  # Smaller batch
                 if loss:
                     total_loss += loss
                     steps += 1
@@ -52,8 +73,13 @@ def train_ai(episodes=1000, save_path="tictactoe_ai.pth"):
         
         # Update monitor
         win = 1 if game.winner == 1 else 0
-        avg_loss = total_loss / (steps // 2) if (steps // 2) > 0 else 0
+        avg_loss = total_loss / (steps // replay_every) if (steps // replay_every) > 0 else 0
         monitor.update(win, avg_loss, ai.epsilon)
+        if profiler is not None:
+            profiler.step()
+        
+        if checkpoints is not None:
+            checkpoints.maybe_save(ai, monitor, episode + 1)
         
         if episode % 50 == 0:
             cprint(f"Episode {episode}, Epsilon: {ai.epsilon:.3f}, Loss: {avg_loss:.3f}", "yellow")
@@ -63,45 +89,48 @@ def train_ai(episodes=1000, save_path="tictactoe_ai.pth"):
             cprint(f"Stopping training - loss too high: {avg_loss:.3f}", "red")
             break
     
+    ai.phase_timer = None
+    monitor.flush()
+    if profiler is not None:
+        profiler.stop()
+        profiler.report()
     ai.save_model(save_path)
     cprint(f"Training completed! Model saved as {save_path}", "green", attrs=['bold'])
     return ai, monitor
 
-def continue_training(ai, additional_episodes=100):
-    """Continue training an existing AI"""
-    monitor = TrainingMonitor()
+def continue_training(ai, additional_episodes=100, log_path=None, profiler=None,
+                      batch_size=16, replay_every=2, checkpoints=None):
+    """Continue training an existing AI, snapshotting it if a CheckpointManager is given
+    
+    Snapshots are numbered on from the newest one already in the directory,
+    so an earlier run's snapshots are never overwritten.
+    """
+    episode_offset = checkpoints.latest_episode() if checkpoints is not None else 0
+    monitor = TrainingMonitor(log_path=log_path)
+    ai.phase_timer = monitor
+    if profiler is not None:
+        profiler.start()
     
     cprint(f"Continuing training for {additional_episodes} episodes...", "blue")
     
     for episode in range(additional_episodes):
-        game = TicTacToeGame()
+        game = TicTacToeGame(ai.rows, ai.cols, ai.k)
         state = game.reset()
         total_loss = 0
         steps = 0
         
         while not game.done:
-            available_actions = game.get_available_actions()
-            action = ai.choose_action(state, available_actions)
-            next_state, reward, done = game.make_move(action)
-            
-            # Simple rewards
-            if done:
-                if game.winner == 1:
-                    reward = 3
-                elif game.winner == -1:
-                    reward = -5
-                else:
-                    reward = 0.1
-            else:
-                reward = 0
-            
-            reward = max(min(reward, 5), -5)
+            with monitor.phase('acting'):
+                available_actions = game._available_actions()
+                action = ai.choose_action(state, available_actions)
+                next_state, _, done = game.make_move(action)
+                reward = mover_reward(game)
             
             ai.remember(state, action, reward, next_state, done)
             state = next_state
             
-            if steps % 2 == 0:
-                loss = ai.replay(batch_size=16)
+            if steps % replay_every == 0:
+                loss = ai.replay(batch_size=batch_size)
                 if loss:
                     total_loss += loss
                     steps += 1
@@ -110,8 +139,13 @@ def continue_training(ai, additional_episodes=100):
         
         # Update monitor
         win = 1 if game.winner == 1 else 0
-        avg_loss = total_loss / (steps // 2) if (steps // 2) > 0 else 0
+        avg_loss = total_loss / (steps // replay_every) if (steps // replay_every) > 0 else 0
         monitor.update(win, avg_loss, ai.epsilon)
+        if profiler is not None:
+            profiler.step()
+        
+        if checkpoints is not None:
+            checkpoints.maybe_save(ai, monitor, episode_offset + episode + 1)
         
         if episode % 50 == 0:
             cprint(f"Additional Episode {episode}, Epsilon: {ai.epsilon:.3f}, Loss: {avg_loss:.3f}", "magenta")
@@ -120,7 +154,225 @@ def continue_training(ai, additional_episodes=100):
             cprint(f"Stopping training - loss too high: {avg_loss:.3f}", "red")
             break
     
+    ai.phase_timer = None
+    monitor.flush()
+    if profiler is not None:
+        profiler.stop()
+        profiler.report()
     return ai, monitor
 
+def _self_play_episode(ai):
+    """Play one self-play game with the rewards used by train_ai"""
+    game = TicTacToeGame(ai.rows, ai.cols, ai.k)
+    state = game.reset()
+    transitions = []
+    
+    while not game.done:
+        available_actions = game._available_actions()
+        action = ai.choose_action(state, available_actions)
+        next_state, _, done = game.make_move(action)
+        reward = mover_reward(game)
+        
+        transitions.append((state, action, reward, next_state, done))
+        state = next_state
+    
+    return transitions, game.winner
+
+def _actor_loop(actor_id, weight_queue, transition_queue, stop_event, seed, model_config=None):
+    """Actor process: play games with the latest broadcast weights and ship the transitions"""
+    torch.set_num_threads(1)
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    
+    # Acting only on the CPU, the learner owns the replay buffer
+    ai = TicTacToeAI(memory_size=1, **(model_config or {}))
+    weights = weight_queue.get()  # Block until the first broadcast
+    
+    while not stop_event.is_set():
+        # Drain the queue so we always act with the newest weights
+        try:
+            while True:
+                weights = weight_queue.get_nowait()
+        except queue.Empty:
+            pass
+        if weights is not None:
+            ai.model.load_state_dict(weights['model_state_dict'])
+            ai.epsilon = weights['epsilon']
+            weights = None
+        
+        transitions, winner = _self_play_episode(ai)
+        transition_queue.put((actor_id, transitions, winner))
+
+def _actor_config(ai):
+    """TicTacToeAI options an actor needs to act exactly like the learner"""
+    return {'rows': ai.rows, 'cols': ai.cols, 'k': ai.k, 'architecture': ai.architecture,
+            'hidden_size': ai.hidden_size, 'augment': ai.augment}
+
+def _broadcast_weights(ai, weight_queues):
+    weights = {
+        'model_state_dict': {k: v.detach().cpu().clone() for k, v in ai.model.state_dict().items()},
+        'epsilon': ai.epsilon
+    }
+    for weight_queue in weight_queues:
+        try:
+            weight_queue.put_nowait(weights)
+        except queue.Full:
+            pass  # The actor has not consumed the previous weights yet; it will catch up
+
+def train_distributed(episodes=1000, save_path="tictactoe_ai.pth", num_actors=None,
+                      sync_interval=50, batch_size=16, prioritized=False,
+                      target_update=None, double_dqn=False, augment=None, log_path=None,
+                      profiler=None, rows=3, cols=3, k=3, architecture='mlp', hidden_size=32,
+                      device='cpu'):
+    """Train with a pool of actor processes feeding a single learner
+    
+    Actors play self-play games with a periodically synced copy of the
+    network and stream transitions over a queue. The learner (this process)
+    owns the optimizer and replay buffer, runs one replay step per two moves
+    received (like train_ai) and broadcasts weights every `sync_interval`
+    updates.
+    """
+    num_actors = num_actors or max(1, (os.cpu_count() or 2) - 1)
+    ai = TicTacToeAI(prioritized=prioritized, target_update=target_update, double_dqn=double_dqn,
+                     augment=augment, rows=rows, cols=cols, k=k, architecture=architecture,
+                     hidden_size=hidden_size, device=device)
+    model_config = _actor_config(ai)
+    monitor = TrainingMonitor(log_path=log_path)
+    ai.phase_timer = monitor
+    if profiler is not None:
+        profiler.start()  # Profiles the learner; actors run uninstrumented
+    
+    ctx = mp.get_context("spawn")
+    transition_queue = ctx.Queue(maxsize=num_actors * 8)
+    weight_queues = [ctx.Queue(maxsize=2) for _ in range(num_actors)]
+    stop_event = ctx.Event()
+    base_seed = random.randrange(2 ** 31)
+    actors = [
+        ctx.Process(target=_actor_loop,
+                    args=(i, weight_queues[i], transition_queue, stop_event, base_seed + i, model_config),
+                    daemon=True)
+        for i in range(num_actors)
+    ]
+    for actor in actors:
+        actor.start()
+    _broadcast_weights(ai, weight_queues)
+    
+    cprint(f"Starting distributed training with {num_actors} actors...", "cyan", attrs=['bold'])
+    
+    start_time = time.time()
+    updates = 0
+    updates_since_sync = 0
+    games = 0
+    
+    try:
+        while games < episodes:
+            try:
+                with monitor.phase('waiting'):
+                    _, transitions, winner = transition_queue.get(timeout=5)
+            except queue.Empty:
+                if not any(actor.is_alive() for actor in actors):
+                    raise RuntimeError("All actor processes exited")
+                continue
+            total_loss = 0
+            replay_steps = 0
+            
+            for i, transition in enumerate(transitions):
+                ai.remember(*transition)
+                if i % 2 == 0:
+                    loss = ai.replay(batch_size=batch_size)
+                    if loss:
+                        total_loss += loss
+                        replay_steps += 1
+            
+            updates += replay_steps
+            updates_since_sync += replay_steps
+            if updates_since_sync >= sync_interval:
+                _broadcast_weights(ai, weight_queues)
+                updates_since_sync = 0
+            
+            win = 1 if winner == 1 else 0
+            avg_loss = total_loss / replay_steps if replay_steps > 0 else 0
+            monitor.update(win, avg_loss, ai.epsilon)
+            if profiler is not None:
+                profiler.step()
+            
+            if games % 50 == 0:
+                elapsed = max(time.time() - start_time, 1e-9)
+                cprint(f"Episode {games}, Epsilon: {ai.epsilon:.3f}, Loss: {avg_loss:.3f}, "
+                       f"Games/sec: {games / elapsed:.1f}, Updates/sec: {updates / elapsed:.1f}", "yellow")
+            games += 1
+            
+            if avg_loss > 50:
+                cprint(f"Stopping training - loss too high: {avg_loss:.3f}", "red")
+                break
+    finally:
+        stop_event.set()
+        # Unblock actors waiting on a full queue before joining them
+        try:
+            while True:
+                transition_queue.get_nowait()
+        except queue.Empty:
+            pass
+        for actor in actors:
+            actor.join(timeout=1)
+            if actor.is_alive():
+                actor.terminate()
+    
+    elapsed = max(time.time() - start_time, 1e-9)
+    throughput = {
+        'games_per_sec': games / elapsed,
+        'updates_per_sec': updates / elapsed,
+        'num_actors': num_actors
+    }
+    cprint(f"Throughput: {throughput['games_per_sec']:.1f} games/sec, "
+           f"{throughput['updates_per_sec']:.1f} updates/sec with {num_actors} actors", "cyan")
+    
+    ai.phase_timer = None
+    monitor.flush()
+    if profiler is not None:
+        profiler.stop()
+        profiler.report()
+    ai.save_model(save_path)
+    cprint(f"Training completed! Model saved as {save_path}", "green", attrs=['bold'])
+    return ai, monitor, throughput
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the Tic-Tac-Toe AI by self-play")
+    parser.add_argument("--episodes", type=int, default=300)
+    parser.add_argument("--save-path", default="tictactoe_ai.pth")
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--cols", type=int, default=3)
+    parser.add_argument("-k", type=int, default=3, help="stones in a row needed to win")
+    parser.add_argument("--architecture", choices=sorted(MODEL_REGISTRY), default="mlp")
+    parser.add_argument("--device", default="cpu", help="cpu, cuda or auto")
+    parser.add_argument("--log", help="append per-episode metrics to this JSONL file")
+    parser.add_argument("--checkpoint-dir", help="write training snapshots to this directory")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="episodes between snapshots")
+    parser.add_argument("--keep-checkpoints", type=int, default=3, help="snapshots to keep (0: all)")
+    parser.add_argument("--resume", action="store_true", help="continue from the latest snapshot")
+    parser.add_argument("--profile", action="store_true", help="print per-section timings at the end")
+    parser.add_argument("--allocations", action="store_true", help="also track allocations (slow)")
+    parser.add_argument("--trace", help="write a Chrome trace of the profiled sections")
+    parser.add_argument("--backend", choices=["cprofile", "torch"], help="also run a cProfile/torch.profiler session")
+    parser.add_argument("--backend-episodes", type=int, default=10)
+    parser.add_argument("--backend-output", help="file for the .prof stats or torch trace")
+    args = parser.parse_args()
+    
+    profiler = None
+    if args.profile or args.allocations or args.trace or args.backend:
+        profiler = Profiler(track_allocations=args.allocations, trace_output=args.trace,
+                            backend=args.backend, backend_episodes=args.backend_episodes,
+                            backend_output=args.backend_output)
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume needs --checkpoint-dir")
+    checkpoints = None
+    if args.checkpoint_dir:
+        checkpoints = CheckpointManager(args.checkpoint_dir, every=args.checkpoint_every,
+                                        keep_last=args.keep_checkpoints)
+    train_ai(episodes=args.episodes, save_path=args.save_path, log_path=args.log, profiler=profiler,
+             rows=args.rows, cols=args.cols, k=args.k, architecture=args.architecture, device=args.device,
+             checkpoints=checkpoints, resume=args.resume)
+
 if __name__ == "__main__":
-    ai, monitor = train_ai(episodes=300)
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -4,21 +4,19 @@ from termcolor import colored, cprint
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.neural_network import TicTacToeAI
-from core.game_environment import TicTacToeGame
+from core.game_environment import TicTacToeGame, board_shape, mover_reward
 
 def play_against_ai(ai, human_first=True, learn_from_game=True):
     """Play a game against the trained AI with optional learning"""
-    game = TicTacToeGame()
+    game = TicTacToeGame(*board_shape(ai))
     state = game.reset()
     
     cprint("Welcome Neural Network Tic-Tac-Toe", "cyan", attrs=['bold'])
+    if not game.classic:
+        cprint(f"{game.rows}x{game.cols} board, {game.k} in a row wins", "white")
     cprint("Cells are numbered as follows:", "white")
-    cprint(" 0 | 1 | 2 ", "yellow")
-    cprint("-----------", "white")
-    cprint(" 3 | 4 | 5 ", "yellow") 
-    cprint("-----------", "white")
-    cprint(" 6 | 7 | 8 ", "yellow")
+    for line in game.display_cell_numbers().splitlines():
+        cprint(line, "white" if line.startswith("-") else "yellow")
     print()
     
     human_player = 1 if human_first else -1
@@ -33,7 +31,7 @@ def play_against_ai(ai, human_first=True, learn_from_game=True):
         if game.current_player == human_player:
             # Human turn
             try:
-                action = int(input(colored("Enter your move (0-8): ", "green")))
+                action = int(input(colored(f"Enter your move (0-{game.size - 1}): ", "green")))
                 if action not in game.get_available_actions():
                     cprint("Invalid move", "red")
                     continue
@@ -48,8 +46,8 @@ def play_against_ai(ai, human_first=True, learn_from_game=True):
         
         # Store move for learning
         old_state = state.copy()
-        state, reward, done = game.make_move(action)
-        game_history.append((old_state, action, reward, state, done))
+        state, _, done = game.make_move(action)
+        game_history.append((old_state, action, mover_reward(game), state, done))
     
     # Final result
     cprint("\n" + "="*30, "cyan")
@@ -62,8 +60,8 @@ def play_against_ai(ai, human_first=True, learn_from_game=True):
         cprint("Draw!", "yellow", attrs=['bold'])
     cprint("="*30, "cyan")
     
-    # Learn from this game
-    if learn_from_game:
+    # Learn from this game (search players such as MCTSPlayer have nothing to train)
+    if learn_from_game and hasattr(ai, 'remember'):
         cprint("AI learning from this game...", "blue")
         for experience in game_history:
             ai.remember(*experience)
@@ -101,7 +99,7 @@ def tournament_mode(ai, num_games=5):
         cprint(f"\n--- Game {game_num + 1} ---", "yellow", attrs=['bold'])
         human_first = (game_num % 2 == 0)
         
-        game = TicTacToeGame()
+        game = TicTacToeGame(*board_shape(ai))
         state = game.reset()
         human_player = 1 if human_first else -1
         
@@ -109,7 +107,7 @@ def tournament_mode(ai, num_games=5):
             if game.current_player == human_player:
                 print(game.display_board())
                 try:
-                    action = int(input(colored("Your move (0-8): ", "green")))
+                    action = int(input(colored(f"Your move (0-{game.size - 1}): ", "green")))
                     if action not in game.get_available_actions():
                         cprint("Invalid move", "red")
                         continue
@@ -1,19 +1,28 @@
 import os
 import sys
+import argparse
 from termcolor import colored, cprint
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from core.training import train_ai, continue_training
-from gameplay.human_vs_ai import play_against_ai, continue_training_during_play, tournament_mode
-from utils.analysis import analyze_ai_performance
-from utils.monitor import TrainingMonitor
-from core.neural_network import TicTacToeAI
+# Heavy modules (torch, matplotlib) are imported inside the functions that need
+# them, so the menu and the quick-play path start without loading torch.
 
 MODEL_PATH = "tictactoe_ai.pth"
+NUMPY_MODEL_PATH = "tictactoe_ai.npz"
+POLICY_TABLE_PATH = "tictactoe_policy.npz"
+
+def save_ai(ai):
+    """Save the full checkpoint plus the lightweight NumPy weights"""
+    from core.numpy_inference import export_numpy_weights
+    ai.save_model(MODEL_PATH)
+    if ai.architecture == 'mlp':
+        export_numpy_weights(ai, NUMPY_MODEL_PATH)
 
 def load_or_train_ai():
     """Load existing AI or train new one"""
+    from core.neural_network import TicTacToeAI
+    
     if os.path.exists(MODEL_PATH):
         cprint("Loading existing AI model...", "magenta")
         ai = TicTacToeAI()
@@ -21,17 +30,58 @@ def load_or_train_ai():
         cprint(f"Model loaded! Current epsilon: {ai.epsilon:.3f}", "green")
         return ai
     else:
-        cprint("No existing model found. Training new AI...", "yellow")
-        ai, monitor = train_ai(episodes=500, save_path=MODEL_PATH) #first training = 500
-        monitor.plot_progress()
+        # First run: fit the network to solver-labeled positions (seconds)
+        # instead of a long self-play run; play and training refine it later
+        from core.pretraining import DATASET_DIR, build_dataset, pretrain
+        cprint("No existing model found. Pretraining new AI on solved positions...", "yellow")
+        if not os.path.exists(os.path.join(DATASET_DIR, "meta.json")):
+            build_dataset(DATASET_DIR)
+        ai = pretrain(dataset_dir=DATASET_DIR)
+        save_ai(ai)
         return ai
 
+def load_inference_ai():
+    """Torch-free AI for play without learning, if exported weights are up to date"""
+    if (os.path.exists(NUMPY_MODEL_PATH) and
+            (not os.path.exists(MODEL_PATH) or os.path.getmtime(NUMPY_MODEL_PATH) >= os.path.getmtime(MODEL_PATH))):
+        from core.numpy_inference import NumpyTicTacToeAI
+        return NumpyTicTacToeAI(NUMPY_MODEL_PATH)
+    first_run = not os.path.exists(MODEL_PATH)
+    ai = load_or_train_ai()  # Saves both files on the first run
+    if ai.architecture == 'mlp' and not first_run:
+        # Refresh the NumPy export only: rewriting the checkpoint would bump
+        # its mtime and make the move server reload it
+        from core.numpy_inference import export_numpy_weights
+        export_numpy_weights(ai, NUMPY_MODEL_PATH)
+    return ai
+
+def export_policy(filepath):
+    """Compile the current AI into a NumPy move table (3x3 only)"""
+    from core.policy_table import export_policy_table
+    ai = load_or_train_ai()
+    positions = export_policy_table(ai, filepath)
+    cprint(f"Exported moves for {positions} positions to {filepath}", "green")
+
+def quick_play(mcts_simulations=None):
+    """Play a single game (no learning) with the lightweight inference path
+    
+    With mcts_simulations the network guides a Monte Carlo Tree Search.
+    """
+    from gameplay.human_vs_ai import play_against_ai
+    
+    ai = load_inference_ai()
+    if mcts_simulations:
+        from core.mcts import MCTSPlayer
+        ai = MCTSPlayer(ai, num_simulations=mcts_simulations, use_transpositions=True)
+    human_first = input(colored("Do you want to go first? (y/n): ", "yellow")).lower().strip() == 'y'
+    play_against_ai(ai, human_first, learn_from_game=False)
+
 def main():
     cprint("Neural Network Tic-Tac-Toe", "cyan", attrs=['bold'])
     cprint("=" * 40, "cyan")
     
-    # Load or train AI
-    ai = load_or_train_ai()
+    # The full (torch) AI is only loaded once an option needs it
+    ai = None
     
     while True:
         cprint("\nMain Menu:", "white", attrs=['bold'])
@@ -46,39 +96,64 @@ def main():
         choice = input(colored("Choose an option (1-7): ", "white")).strip()
         
         if choice == "1":
+            from gameplay.human_vs_ai import play_against_ai
+            ai = ai or load_or_train_ai()
             human_first = input(colored("Do you want to go first? (y/n): ", "yellow")).lower().strip() == 'y'
             play_against_ai(ai, human_first)
             
         elif choice == "2":
+            from gameplay.human_vs_ai import continue_training_during_play
+            ai = ai or load_or_train_ai()
             games = int(input(colored("How many games to play? (default 3): ", "blue")) or 3)
             continue_training_during_play(ai, games)
             
         elif choice == "3":
+            from gameplay.human_vs_ai import tournament_mode
             games = int(input(colored("How many tournament games? (default 3): ", "green")) or 3)
-            tournament_mode(ai, games)
+            tournament_mode(ai or load_inference_ai(), games)
             
         elif choice == "4":
+            from core.training import continue_training
+            ai = ai or load_or_train_ai()
             episodes = int(input(colored("How many additional episodes? (default 100): ", "magenta")) or 100)
             ai, monitor = continue_training(ai, episodes)
-            ai.save_model(MODEL_PATH)
+            save_ai(ai)
             monitor.plot_progress()
             
         elif choice == "5":
+            from utils.analysis import analyze_ai_performance
             games = int(input(colored("How many test games? (default 50): ", "cyan")) or 50)
-            analyze_ai_performance(ai, games)
+            analyze_ai_performance(ai or load_inference_ai(), games)
             
         elif choice == "6":
+            from core.training import train_ai
             cprint("Training a new model to demonstrate progress...", "white")
             demo_ai, demo_monitor = train_ai(episodes=200)
             demo_monitor.plot_progress()
             
         elif choice == "7":
-            ai.save_model(MODEL_PATH)
-            cprint("Model saved. Thanks for playing", "green", attrs=['bold'])
+            if ai is not None:
+                save_ai(ai)
+                cprint("Model saved. Thanks for playing", "green", attrs=['bold'])
+            else:
+                cprint("Thanks for playing", "green", attrs=['bold'])
             break
             
         else:
             cprint("Invalid choice", "red")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Neural Network Tic-Tac-Toe")
+    parser.add_argument("--play", action="store_true", help="play one quick game without learning")
+    parser.add_argument("--mcts", type=int, metavar="N", help="with --play: search N simulations per move")
+    parser.add_argument("--export-policy", nargs="?", const=POLICY_TABLE_PATH, metavar="PATH",
+                        help=f"compile the AI into a move table (default {POLICY_TABLE_PATH})")
+    args = parser.parse_args()
+    if args.mcts is not None and (not args.play or args.mcts < 1):
+        parser.error("--mcts needs --play and a positive number of simulations")
+    if args.play:
+        quick_play(args.mcts)
+    elif args.export_policy:
+        export_policy(args.export_policy)
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1 @@
+# Serving package
\ No newline at end of file
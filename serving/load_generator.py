@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+from termcolor import cprint
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.bitboard import BOARDS, LEGAL_MASK, WINNER, reachable_positions
+
+
+def sample_boards(count):
+    """Random playable positions to send as requests"""
+    positions = reachable_positions()
+    positions = positions[(WINNER[positions] == 0) & (LEGAL_MASK[positions] != 0)]
+    return BOARDS[np.random.choice(positions, size=count)].tolist()
+
+
+async def _client(host, port, boards, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for board in boards:
+            body = json.dumps({'board': board}).encode()
+            start = time.perf_counter()
+            writer.write(
+                f"POST /move HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            if b" 200 " not in status_line:
+                raise RuntimeError(f"Unexpected response: {status_line.decode().strip()}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(host="127.0.0.1", port=8000, concurrency=64, requests_per_client=200):
+    """Hammer the server with `concurrency` keep-alive clients and report latency"""
+    latencies = []
+    boards = sample_boards(concurrency * requests_per_client)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, boards[i * requests_per_client:(i + 1) * requests_per_client], latencies)
+        for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+    
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the move server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    args = parser.parse_args()
+    
+    results = asyncio.run(run_load(args.host, args.port, args.concurrency, args.requests))
+    cprint("=== Load Test Results ===", "cyan", attrs=['bold'])
+    cprint(f"Requests: {results['requests']}", "white")
+    cprint(f"Requests/sec: {results['requests_per_sec']:.1f}", "green")
+    cprint(f"p50 latency: {results['p50_ms']:.2f} ms", "yellow")
+    cprint(f"p99 latency: {results['p99_ms']:.2f} ms", "yellow")
+
+
+if __name__ == "__main__":
+    main()
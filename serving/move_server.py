@@ -0,0 +1,262 @@
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+import numpy as np
+from termcolor import cprint
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.game_environment import winning_lines
+from core.neural_network import INFERENCE_DTYPES, TicTacToeAI
+
+MODEL_PATH = "tictactoe_ai.pth"
+
+MAX_BODY_BYTES = 64 * 1024  # A 19x19 board is about 1 KB of JSON
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class LatencyStats:
+    """Request latencies over a bounded window plus a running request count"""
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.timestamps = deque(maxlen=window)
+        self.total_requests = 0
+        self.total_batches = 0
+        self.started = time.perf_counter()
+    
+    def record(self, latency):
+        self.latencies.append(latency)
+        self.timestamps.append(time.perf_counter())
+        self.total_requests += 1
+    
+    def summary(self):
+        stats = {
+            'total_requests': self.total_requests,
+            'total_batches': self.total_batches,
+            'avg_batch_size': self.total_requests / self.total_batches if self.total_batches else 0.0,
+            'uptime_sec': time.perf_counter() - self.started
+        }
+        if self.latencies:
+            latencies_ms = np.array(self.latencies) * 1000
+            stats['p50_ms'] = float(np.percentile(latencies_ms, 50))
+            stats['p99_ms'] = float(np.percentile(latencies_ms, 99))
+            span = self.timestamps[-1] - self.timestamps[0]
+            stats['requests_per_sec'] = (len(self.timestamps) - 1) / span if span > 0 else 0.0
+        return stats
+
+
+class MoveServer:
+    """HTTP/JSON move server that micro-batches concurrent requests
+    
+    Requests that arrive within `batch_window_ms` of each other (up to
+    `max_batch_size`) are answered by a single forward pass. The checkpoint
+    is polled every `reload_interval` seconds and swapped in when it changes.
+    
+    POST /move  {"board": [rows * cols cells of 1, -1, 0]}  ->  {"action": int}
+    GET  /stats                                           ->  latency / throughput counters
+    GET  /health                                          ->  {"status": "ok"}
+    """
+    def __init__(self, model_path=MODEL_PATH, host="127.0.0.1", port=8000,
+                 max_batch_size=256, batch_window_ms=2.0, reload_interval=1.0,
+                 device='cpu', inference_dtype=None):
+        self.model_path = model_path
+        self.device = device
+        self.inference_dtype = inference_dtype  # None: use the one stored in the checkpoint
+        self.host = host
+        self.port = port
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        self.reload_interval = reload_interval
+        self.stats = LatencyStats()
+        self.ai = None
+        self.model_mtime = None
+        self._lines = {}  # (rows, cols, k) -> winning lines, for board validation
+        self._load_model()
+    
+    def _load_model(self):
+        mtime = os.path.getmtime(self.model_path)
+        ai = TicTacToeAI(device=self.device)
+        ai.load_model(self.model_path, map_location=ai.device, inference_only=True)
+        if self.inference_dtype is not None:
+            ai.inference_dtype = self.inference_dtype
+        ai.epsilon = 0  # Serve greedy moves
+        self.ai = ai
+        self.model_mtime = mtime
+    
+    async def _watch_model(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if os.path.getmtime(self.model_path) != self.model_mtime:
+                    self._load_model()
+                    cprint(f"Reloaded model from {self.model_path}", "green")
+            except Exception as e:  # Keep serving the old model if the new one is unreadable
+                cprint(f"Model reload failed: {e}", "red")
+    
+    async def _batch_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                # Inside the try: boards validated against a model that was
+                # swapped out meanwhile may not stack or fit the new network
+                boards = np.array([board for board, _ in batch], dtype=np.int8)
+                actions = self.ai.choose_actions(boards, boards == 0, epsilon=0)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats.total_batches += 1
+            for (_, future), action in zip(batch, actions.tolist()):
+                if not future.done():
+                    future.set_result(action)
+    
+    async def predict(self, board):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((board, future))
+        return await future
+    
+    def _validate_board(self, payload):
+        """The board of a /move request; ValueError unless it is a reachable, unfinished position"""
+        board = payload.get('board') if isinstance(payload, dict) else None
+        size = self.ai.board_size
+        if (not isinstance(board, list) or len(board) != size or
+                any(type(cell) is not int or cell not in (-1, 0, 1) for cell in board)):
+            raise ValueError(f"'board' must be a list of {size} cells with values 1, -1 or 0")
+        if 0 not in board:
+            raise ValueError("board has no empty cell")
+        if board.count(1) - board.count(-1) not in (0, 1):
+            raise ValueError("X (1) moves first: the board must have as many X as O, or one more")
+        shape = (self.ai.rows, self.ai.cols, self.ai.k)
+        if shape not in self._lines:
+            self._lines[shape] = winning_lines(*shape)
+        line_sums = np.asarray(board)[self._lines[shape]].sum(axis=1)
+        if np.any(np.abs(line_sums) == self.ai.k):
+            raise ValueError("the game on this board is already won")
+        return board
+    
+    async def _route(self, method, path, body):
+        if path == "/move":
+            if method != "POST":
+                return 405, {'error': "use POST"}
+            try:
+                board = self._validate_board(json.loads(body or b"null"))
+            except ValueError as e:
+                return 400, {'error': str(e)}
+            start = time.perf_counter()
+            try:
+                action = await self.predict(board)
+            except Exception as e:  # e.g. a reload changed the board size while the request was queued
+                return 500, {'error': f"move prediction failed: {e}"}
+            self.stats.record(time.perf_counter() - start)
+            return 200, {'action': action}
+        if path == "/stats":
+            return 200, self.stats.summary()
+        if path == "/health":
+            return 200, {'status': "ok"}
+        return 404, {'error': f"unknown path {path}"}
+    
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode().split(" ", 2)
+                except ValueError:
+                    break
+                
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                keep_alive = headers.get('connection', '').lower() != "close"
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if 0 <= length <= MAX_BODY_BYTES:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._route(method, path, body)
+                else:
+                    # The body is left unread, so the connection cannot be reused
+                    keep_alive = False
+                    if length < 0:
+                        status, payload = 400, {'error': "invalid Content-Length"}
+                    else:
+                        status, payload = 413, {'error': f"body larger than {MAX_BODY_BYTES} bytes"}
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self):
+        self.queue = asyncio.Queue()
+        workers = [asyncio.create_task(self._batch_worker()), asyncio.create_task(self._watch_model())]
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        cprint(f"Serving moves on http://{self.host}:{self.port} "
+               f"(batch window {self.batch_window * 1000:.1f} ms, max batch {self.max_batch_size})", "cyan")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Tic-Tac-Toe moves over HTTP/JSON")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    parser.add_argument("--reload-interval", type=float, default=1.0)
+    parser.add_argument("--device", default="cpu", help="cpu, cuda or auto")
+    parser.add_argument("--inference-dtype", choices=INFERENCE_DTYPES,
+                        help="override the inference dtype stored in the checkpoint "
+                             "(int8 quantizes Linear layers only: conv networks stay mostly float32)")
+    args = parser.parse_args()
+    
+    server = MoveServer(args.model, args.host, args.port, args.max_batch_size,
+                        args.batch_window_ms, args.reload_interval, args.device, args.inference_dtype)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        cprint("Server stopped", "yellow")
+
+
+if __name__ == "__main__":
+    main()
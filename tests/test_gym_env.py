@@ -0,0 +1,53 @@
+import os
+import types
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+import core.gym_env as gym_env
+
+
+class CrashOnUnpickle:
+    """Opponent that kills the spawned worker while its arguments are unpickled"""
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+@pytest.fixture
+def created_blocks(monkeypatch):
+    names = []
+
+    def create(*args, **kwargs):
+        block = shared_memory.SharedMemory(*args, **kwargs)
+        if kwargs.get('create'):
+            names.append(block.name)
+        return block
+
+    monkeypatch.setattr(gym_env, "shared_memory", types.SimpleNamespace(SharedMemory=create))
+    return names
+
+
+def assert_unlinked(names):
+    assert names
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_worker_dying_at_startup_raises_and_cleans_up(created_blocks):
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        gym_env.AsyncVectorEnv(2, num_workers=1, opponent=CrashOnUnpickle())
+    assert_unlinked(created_blocks)
+
+
+def test_worker_dying_mid_run_raises_and_cleans_up(created_blocks):
+    env = gym_env.AsyncVectorEnv(4, num_workers=2, opponent='random')
+    observations, _ = env.reset(seed=0)
+    env._processes[1].kill()
+    env._processes[1].join()
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        env.step(np.argmax(observations == 0, axis=1))
+    assert env.closed
+    assert not any(process.is_alive() for process in env._processes)
+    assert_unlinked(created_blocks)
@@ -0,0 +1,27 @@
+import types
+import multiprocessing as mp
+
+import core.training as training
+from core.neural_network import TicTacToeAI
+
+
+def test_distributed_actors_match_learner(tmp_path, monkeypatch):
+    """Actors are built from the learner's augment and network options"""
+    ctx = mp.get_context("spawn")
+    actor_configs = []
+
+    def process(target, args, daemon):
+        actor_configs.append(args[-1])
+        return ctx.Process(target=target, args=args, daemon=daemon)
+
+    spawn = types.SimpleNamespace(Queue=ctx.Queue, Event=ctx.Event, Process=process)
+    monkeypatch.setattr(training, "mp", types.SimpleNamespace(get_context=lambda method: spawn))
+
+    ai, _, _ = training.train_distributed(episodes=4, save_path=str(tmp_path / "ai.pth"), num_actors=1,
+                                          augment='canonical', hidden_size=16)
+
+    assert len(actor_configs) == 1
+    actor = TicTacToeAI(memory_size=1, **actor_configs[0])
+    assert actor.augment == ai.augment == 'canonical'
+    assert actor.hidden_size == ai.hidden_size == 16
+    actor.model.load_state_dict(ai.model.state_dict())
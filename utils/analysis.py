@@ -1,72 +1,56 @@
+import numpy as np
 from termcolor import colored, cprint
-from core.neural_network import TicTacToeAI
-from core.game_environment import TicTacToeGame
+from core.game_environment import TicTacToeGame, board_shape
+from core.bitboard import BOARDS, LEGAL_ACTIONS, LEGAL_MASK, WINNER, reachable_positions
+from core.solver import get_solver
+from utils.evaluation import evaluate, print_results
 
-def analyze_ai_performance(ai, num_test_games=100):
-    """Analyze AI performance"""
-    wins_as_x = 0
-    wins_as_o = 0
-    draws = 0
+def analyze_ai_performance(ai, num_test_games=100, opponents=("random", "solver"), num_workers=1):
+    """Analyze AI performance against reference opponents, playing both as X and as O"""
+    cprint(f"\nAnalyzing AI performance over {num_test_games} test games per matchup...", "cyan")
     
-    cprint(f"\nAnalyzing AI performance over {num_test_games} test games...", "cyan")
+    # The solver only knows the 3x3 game
+    classic = board_shape(ai) == (3, 3, 3)
+    if not classic:
+        opponents = tuple(opponent for opponent in opponents if opponent != "solver")
     
-    # Test as X (first player)
-    for i in range(num_test_games // 2):
-        game = TicTacToeGame()
-        state = game.reset()
-        
-        while not game.done:
-            available_actions = game.get_available_actions()
-            action = ai.choose_action(state, available_actions)
-            state, _, _ = game.make_move(action)
-        
-        if game.winner == 1:  # X wins
-            wins_as_x += 1
-        elif game.winner == -1:  # O wins
-            wins_as_o += 1
-        else:
-            draws += 1
+    results, games_per_sec = evaluate(ai, opponents, num_test_games, num_workers=num_workers)
+    print_results(results, games_per_sec)
     
-    # Test as O (second player)
-    for i in range(num_test_games // 2):
-        game = TicTacToeGame()
-        state = game.reset()
-        
-        # First move by random opponent
-        available_actions = game.get_available_actions()
-        import random
-        random_action = random.choice(available_actions)
-        state, _, _ = game.make_move(random_action)
-        
-        while not game.done:
-            available_actions = game.get_available_actions()
-            action = ai.choose_action(state, available_actions)
-            state, _, _ = game.make_move(action)
-        
-        if game.winner == 1:  # X wins
-            wins_as_x += 1
-        elif game.winner == -1:  # O wins
-            wins_as_o += 1
-        else:
-            draws += 1
-    
-    total_games = wins_as_x + wins_as_o + draws
+    wins_as_x = sum(r['wins'] for r in results if r['side'] == 'X')
+    wins_as_o = sum(r['wins'] for r in results if r['side'] == 'O')
+    draws = sum(r['draws'] for r in results)
+    total_games = sum(r['games'] for r in results)
     
-    cprint(f"=== Performance Analysis ===", "cyan", attrs=['bold'])
-    cprint(f"Wins as X: {wins_as_x}/{num_test_games}", "green")
-    cprint(f"Wins as O: {wins_as_o}/{num_test_games}", "blue")
-    cprint(f"Draws: {draws}/{num_test_games}", "yellow")
-    cprint(f"Total win rate: {(wins_as_x + wins_as_o) / total_games * 100:.1f}%", "white")
-    cprint(f"Win rate as X: {wins_as_x / (num_test_games) * 100:.1f}%", "green")
-    cprint(f"Win rate as O: {wins_as_o / (num_test_games) * 100:.1f}%", "blue")
+    optimal_rate = optimal_move_rate(ai) if classic else None
+    if optimal_rate is not None:
+        cprint(f"Optimal move rate: {optimal_rate * 100:.1f}%", "magenta")
     
     return {
         'wins_as_x': wins_as_x,
         'wins_as_o': wins_as_o,
         'draws': draws,
-        'total_win_rate': (wins_as_x + wins_as_o) / total_games
+        'total_win_rate': (wins_as_x + wins_as_o) / total_games,
+        'optimal_move_rate': optimal_rate,
+        'matchups': results,
+        'games_per_sec': games_per_sec
     }
 
+def optimal_move_rate(ai, solver=None):
+    """Fraction of reachable positions where the greedy AI move is optimal"""
+    solver = solver or get_solver()
+    positions = reachable_positions()
+    positions = positions[(WINNER[positions] == 0) & (LEGAL_MASK[positions] != 0)]
+    boards = BOARDS[positions]
+    
+    if hasattr(ai, 'choose_actions'):
+        actions = ai.choose_actions(boards, boards == 0, epsilon=0)
+    else:
+        actions = np.array([ai.choose_action(board.tolist(), LEGAL_ACTIONS[index])
+                            for board, index in zip(boards, positions.tolist())])
+    optimal = (solver.best_masks[positions] >> actions) & 1
+    return float(optimal.mean())
+
 def test_ai_strategy(ai, test_scenarios=None):
     """Test AI on specific board scenarios"""
     if test_scenarios is None:
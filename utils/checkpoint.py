@@ -0,0 +1,119 @@
+import os
+import re
+import random
+import tempfile
+import numpy as np
+import torch
+
+# Crash-safe checkpoint files and periodic training snapshots.
+# Every file is written to a temporary file in the same directory and moved
+# into place with os.replace, so a reader (or a resumed run) only ever sees
+# a complete old file or a complete new one.
+
+
+def atomic_save(obj, filepath):
+    """torch.save that never leaves a partially written file at filepath"""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(filepath) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            torch.save(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def get_rng_state():
+    """Python, NumPy and torch generator states, stored so that weights_only loading accepts them"""
+    _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    state = {
+        'python': random.getstate(),
+        'numpy': {'keys': torch.from_numpy(keys.astype(np.int64)), 'pos': pos,
+                  'has_gauss': has_gauss, 'cached_gaussian': cached_gaussian},
+        'torch': torch.get_rng_state()
+    }
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    random.setstate(state['python'])
+    numpy_state = state['numpy']
+    np.random.set_state(('MT19937', numpy_state['keys'].numpy().astype(np.uint32), numpy_state['pos'],
+                         numpy_state['has_gauss'], numpy_state['cached_gaussian']))
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+class CheckpointManager:
+    """Periodic training snapshots in `directory`, keeping the newest `keep_last`
+
+    A snapshot is a full TicTacToeAI checkpoint (weights, optimizer, target
+    network, replay buffer) plus the RNG states, the TrainingMonitor state
+    and the number of finished episodes, so a run restored from it continues
+    exactly as if it had never stopped.
+    """
+    def __init__(self, directory, every=100, keep_last=3, prefix="snapshot"):
+        self.directory = directory
+        self.every = every
+        self.keep_last = keep_last
+        self.prefix = prefix
+        self._pattern = re.compile(re.escape(prefix) + r"_(\d+)\.pth$")
+        os.makedirs(directory, exist_ok=True)
+
+    def snapshots(self):
+        """(episodes, path) of every snapshot, oldest first"""
+        found = []
+        for name in os.listdir(self.directory):
+            match = self._pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def latest(self):
+        snapshots = self.snapshots()
+        return snapshots[-1][1] if snapshots else None
+
+    def latest_episode(self):
+        """Episodes done at the newest snapshot, 0 if there is none"""
+        snapshots = self.snapshots()
+        return snapshots[-1][0] if snapshots else 0
+
+    def maybe_save(self, ai, monitor, episodes_done):
+        """Save after every `every` finished episodes"""
+        if self.every and episodes_done % self.every == 0:
+            return self.save(ai, monitor, episodes_done)
+        return None
+
+    def save(self, ai, monitor, episodes_done):
+        monitor.flush()  # The log on disk must match the saved monitor state
+        checkpoint = ai.checkpoint_dict()
+        checkpoint['episodes_done'] = episodes_done
+        checkpoint['rng_state'] = get_rng_state()
+        checkpoint['monitor_state'] = monitor.state_dict()
+        path = os.path.join(self.directory, f"{self.prefix}_{episodes_done:08d}.pth")
+        atomic_save(checkpoint, path)
+        if self.keep_last:
+            for _, old_path in self.snapshots()[:-self.keep_last]:
+                os.remove(old_path)
+        return path
+
+    def restore(self, ai, monitor, path=None):
+        """Load a snapshot (the latest by default) into ai and monitor
+
+        Returns the number of episodes already done, or 0 if there is no
+        snapshot to resume from.
+        """
+        path = path or self.latest()
+        if path is None:
+            return 0
+        checkpoint = ai.load_model(path)
+        monitor.load_state_dict(checkpoint['monitor_state'])
+        set_rng_state(checkpoint['rng_state'])
+        return checkpoint['episodes_done']
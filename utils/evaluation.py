@@ -0,0 +1,201 @@
+import sys
+import os
+import time
+import math
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from termcolor import cprint
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.game_environment import BatchTicTacToeGame, board_shape
+from core.solver import get_solver
+
+
+class RandomPlayer:
+    """Uniformly random legal moves"""
+    epsilon = 1.0
+
+    def choose_action(self, state, available_actions):
+        return int(np.random.choice(list(available_actions)))
+
+    def choose_actions(self, states, legal_masks, epsilon=None):
+        legal_masks = np.asarray(legal_masks, dtype=bool)
+        return (np.random.random(legal_masks.shape) * legal_masks).argmax(axis=1)
+
+
+def load_player(spec):
+    """Build a player from a spec: 'random', 'solver', a .pth checkpoint, a .npz
+    weights file or policy table, 'mcts:<spec>' / 'mcts<N>:<spec>' (MCTS with N simulations
+    over the network in <spec>), or any object that already has choose_actions"""
+    if not isinstance(spec, str):
+        return spec
+    if spec.startswith("mcts") and ":" in spec:
+        from core.mcts import MCTSPlayer
+        prefix, network_spec = spec.split(":", 1)
+        simulations = int(prefix[4:]) if prefix[4:] else 200
+        return MCTSPlayer(load_player(network_spec), num_simulations=simulations, use_transpositions=True)
+    if spec == "random":
+        return RandomPlayer()
+    if spec == "solver":
+        return get_solver()
+    if spec.endswith(".npz"):
+        with np.load(spec) as data:
+            is_policy_table = 'moves' in data.files
+        if is_policy_table:
+            from core.policy_table import TablePolicy
+            return TablePolicy(spec)
+        from core.numpy_inference import NumpyTicTacToeAI
+        return NumpyTicTacToeAI(spec)
+    if spec.endswith(".pth"):
+        from core.neural_network import TicTacToeAI
+        ai = TicTacToeAI()
+        ai.load_model(spec, inference_only=True)
+        return ai
+    raise ValueError(f"Unknown player spec: {spec}")
+
+
+def player_name(spec):
+    if isinstance(spec, str):
+        if spec.startswith("mcts") and ":" in spec:
+            prefix, path = spec.split(":", 1)
+            return f"{prefix}:{os.path.basename(path)}"
+        return os.path.basename(spec)
+    return type(spec).__name__
+
+
+def play_games(x_player, o_player, num_games, x_epsilon=0.0, o_epsilon=0.0):
+    """Play num_games in lockstep on a batch environment and return the winners array
+
+    All games start together, so on every step the same side is to move in
+    every unfinished game and one batched choose_actions call covers them all.
+    The board size comes from whichever player was built for one (3x3 otherwise).
+    """
+    rows, cols, k = board_shape(x_player if hasattr(x_player, 'k') else o_player)
+    env = BatchTicTacToeGame(num_games, auto_reset=False, rows=rows, cols=cols, k=k)
+    players = {1: x_player, -1: o_player}
+    epsilons = {1: x_epsilon, -1: o_epsilon}
+    side = 1
+    while not env.done.all():
+        active = ~env.done
+        actions = np.zeros(num_games, dtype=np.int64)
+        boards = env.boards[active]
+        actions[active] = players[side].choose_actions(boards, boards == 0, epsilon=epsilons[side])
+        env.make_moves(actions)
+        side = -side
+    return env.winners.copy()
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """95% Wilson score interval for a binomial proportion"""
+    if trials == 0:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def _run_matchup(agent_spec, opponent_spec, agent_side, num_games, epsilon, seed):
+    np.random.seed(seed)
+    agent = load_player(agent_spec)
+    opponent = load_player(opponent_spec)
+    if agent_side == 1:
+        winners = play_games(agent, opponent, num_games, x_epsilon=epsilon)
+    else:
+        winners = play_games(opponent, agent, num_games, o_epsilon=epsilon)
+    wins = int((winners == agent_side).sum())
+    losses = int((winners == -agent_side).sum())
+    return wins, num_games - wins - losses, losses
+
+
+def evaluate(agent, opponents=("random", "solver"), games_per_matchup=1000,
+             sides=(1, -1), num_workers=1, epsilon=0.0):
+    """Play the agent against every opponent on every side
+
+    Players can be specs understood by load_player or objects with
+    choose_actions. `epsilon` is the agent's exploration rate; opponents
+    always play their own policy. With num_workers > 1 each matchup is split
+    into chunks that run in separate processes (players are pickled to the
+    workers). Returns a list of result dicts plus the overall games/sec.
+    """
+    matchups = [(opponent, side) for opponent in opponents for side in sides]
+    start = time.perf_counter()
+
+    if num_workers > 1:
+        chunk = math.ceil(games_per_matchup / num_workers)
+        jobs = []
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx) as pool:
+            for m, (opponent, side) in enumerate(matchups):
+                remaining = games_per_matchup
+                while remaining > 0:
+                    size = min(chunk, remaining)
+                    seed = np.random.randint(2 ** 31)
+                    jobs.append((m, pool.submit(_run_matchup, agent, opponent, side, size, epsilon, seed)))
+                    remaining -= size
+            counts = [[0, 0, 0] for _ in matchups]
+            for m, job in jobs:
+                for i, value in enumerate(job.result()):
+                    counts[m][i] += value
+    else:
+        agent = load_player(agent)
+        counts = [
+            list(_run_matchup(agent, load_player(opponent), side, games_per_matchup, epsilon,
+                              np.random.randint(2 ** 31)))
+            for opponent, side in matchups
+        ]
+
+    elapsed = time.perf_counter() - start
+    results = []
+    for (opponent, side), (wins, draws, losses) in zip(matchups, counts):
+        games = wins + draws + losses
+        results.append({
+            'opponent': player_name(opponent),
+            'side': 'X' if side == 1 else 'O',
+            'games': games,
+            'wins': wins,
+            'draws': draws,
+            'losses': losses,
+            'win_rate': wins / games,
+            'draw_rate': draws / games,
+            'loss_rate': losses / games,
+            'win_ci': wilson_interval(wins, games),
+            'draw_ci': wilson_interval(draws, games),
+            'loss_ci': wilson_interval(losses, games)
+        })
+    games_per_sec = len(matchups) * games_per_matchup / elapsed if elapsed > 0 else 0.0
+    return results, games_per_sec
+
+
+def print_results(results, games_per_sec):
+    cprint("=== Evaluation Results ===", "cyan", attrs=['bold'])
+    cprint(f"{'Opponent':<20}{'Side':<6}{'Win':>18}{'Draw':>18}{'Loss':>18}", "white", attrs=['bold'])
+    for r in results:
+        cells = [f"{r[k + '_rate'] * 100:5.1f}% [{r[k + '_ci'][0] * 100:4.1f}-{r[k + '_ci'][1] * 100:5.1f}]"
+                 for k in ('win', 'draw', 'loss')]
+        color = "red" if r['losses'] > 0 else "green"
+        cprint(f"{r['opponent']:<20}{r['side']:<6}{cells[0]:>18}{cells[1]:>18}{cells[2]:>18}", color)
+    cprint(f"Games/sec: {games_per_sec:.0f}", "magenta")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a Tic-Tac-Toe agent against a set of opponents")
+    parser.add_argument("agent", help="checkpoint (.pth), numpy weights (.npz), 'random', 'solver' "
+                                      "or mcts[N]:<checkpoint>")
+    parser.add_argument("--opponents", nargs="+", default=["random", "solver"])
+    parser.add_argument("--games", type=int, default=1000, help="games per matchup and side")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--epsilon", type=float, default=0.0, help="exploration rate of the agent")
+    args = parser.parse_args()
+
+    results, games_per_sec = evaluate(args.agent, args.opponents, args.games,
+                                      num_workers=args.workers, epsilon=args.epsilon)
+    print_results(results, games_per_sec)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,79 +1,210 @@
-import matplotlib.pyplot as plt
-import numpy as np
+import os
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from utils.profiler import section
 
 class TrainingMonitor:
-    def __init__(self):
-        self.wins = []
-        self.losses = []
-        self.epsilons = []
-        self.win_rates = []
-        
+    """Training metrics with O(1) updates and bounded memory
+
+    The rolling win rate is kept as a running sum over a fixed window, the
+    per-episode history lives in ring buffers of `history_size` entries, and
+    every episode can be streamed to an append-only JSONL log that is flushed
+    every `flush_every` episodes.
+    """
+    def __init__(self, window=100, history_size=100000, log_path=None, flush_every=100):
+        self.window = window
+        self.episodes = deque(maxlen=history_size)
+        self.wins = deque(maxlen=history_size)
+        self.losses = deque(maxlen=history_size)
+        self.epsilons = deque(maxlen=history_size)
+        self.win_rates = deque(maxlen=history_size)
+        self.win_rate_episodes = deque(maxlen=history_size)
+
+        self._recent_wins = deque(maxlen=window)
+        self._recent_sum = 0
+        self.total_episodes = 0
+        self.total_wins = 0
+        self.total_loss = 0.0
+
+        # Wall time and call count per phase (acting, sampling, forward, backward, ...)
+        self.phase_times = {}
+        self.phase_counts = {}
+
+        self.log_path = log_path
+        self.flush_every = flush_every
+        self._pending = []
+
     def update(self, win, loss, epsilon):
+        episode = self.total_episodes
+        self.episodes.append(episode)
         self.wins.append(win)
         self.losses.append(loss)
         self.epsilons.append(epsilon)
-        
+        self.total_episodes += 1
+        self.total_wins += win
+        self.total_loss += loss
+
         # Calculate rolling win rate
-        if len(self.wins) >= 100:
-            recent_wins = self.wins[-100:]
-            win_rate = sum(recent_wins) / len(recent_wins)
+        if len(self._recent_wins) == self.window:
+            self._recent_sum -= self._recent_wins[0]
+        self._recent_wins.append(win)
+        self._recent_sum += win
+        win_rate = None
+        if len(self._recent_wins) == self.window:
+            win_rate = self._recent_sum / self.window
             self.win_rates.append(win_rate)
-    
-    def plot_progress(self, show_win_rate=True):
-        plt.figure(figsize=(15, 5))
-        
+            self.win_rate_episodes.append(episode)
+
+        if self.log_path:
+            self._pending.append({'episode': episode, 'win': win, 'loss': loss,
+                                  'epsilon': epsilon, 'win_rate': win_rate})
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        """Append buffered episodes (and current phase timings) to the log file"""
+        if not self.log_path or not self._pending:
+            return
+        with open(self.log_path, "a") as f:
+            for record in self._pending:
+                f.write(json.dumps(record) + "\n")
+            if self.phase_times:
+                f.write(json.dumps({'episode': self.total_episodes - 1, 'phases': self.get_phase_stats()}) + "\n")
+        self._pending = []
+
+    def state_dict(self):
+        """History and totals for a training snapshot; call after flush()"""
+        return {
+            'episodes': list(self.episodes),
+            'wins': list(self.wins),
+            'losses': list(self.losses),
+            'epsilons': list(self.epsilons),
+            'win_rates': list(self.win_rates),
+            'win_rate_episodes': list(self.win_rate_episodes),
+            'recent_wins': list(self._recent_wins),
+            'total_episodes': self.total_episodes,
+            'total_wins': self.total_wins,
+            'total_loss': self.total_loss,
+            'log_size': os.path.getsize(self.log_path) if self.log_path and os.path.exists(self.log_path) else 0
+        }
+
+    def load_state_dict(self, state):
+        """Restore a snapshot; log lines written after it was taken are dropped"""
+        for name in ('episodes', 'wins', 'losses', 'epsilons', 'win_rates', 'win_rate_episodes'):
+            history = getattr(self, name)
+            history.clear()
+            history.extend(state[name])
+        self._recent_wins.clear()
+        self._recent_wins.extend(state['recent_wins'])
+        self._recent_sum = sum(self._recent_wins)
+        self.total_episodes = state['total_episodes']
+        self.total_wins = state['total_wins']
+        self.total_loss = state['total_loss']
+        self._pending = []
+        if self.log_path and os.path.exists(self.log_path) and os.path.getsize(self.log_path) > state['log_size']:
+            with open(self.log_path, "r+") as f:
+                f.truncate(state['log_size'])
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of work: `with monitor.phase('acting'): ...`"""
+        start = time.perf_counter()
+        try:
+            with section(name):  # Also visible to an active Profiler
+                yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - start
+            self.phase_counts[name] = self.phase_counts.get(name, 0) + 1
+
+    def get_phase_stats(self):
+        return {
+            name: {'total_sec': total, 'calls': self.phase_counts[name],
+                   'avg_us': total / self.phase_counts[name] * 1e6}
+            for name, total in self.phase_times.items()
+        }
+
+    def plot_progress(self, show_win_rate=True, save_path=None):
+        """Plot the recorded history
+
+        With save_path, or when no display is available, the figure is
+        rendered with the Agg backend and written to a PNG instead of
+        blocking on plt.show().
+        """
+        import matplotlib
+        headless = save_path is not None or (os.name != "nt" and not os.environ.get("DISPLAY")
+                                             and not os.environ.get("WAYLAND_DISPLAY"))
+        if headless:
+            matplotlib.use("Agg")
+            save_path = save_path or "training_progress.png"
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=(15, 5))
+
         # Plot wins
         plt.subplot(1, 3, 1)
-        plt.plot(self.wins, alpha=0.3, label='Individual games')
-        
+        plt.plot(self.episodes, self.wins, alpha=0.3, label='Individual games')
+
         # Plot smoothed win rate
         if show_win_rate and len(self.win_rates) > 0:
-            plt.plot(range(99, 99 + len(self.win_rates)), self.win_rates, 
-                    color='red', linewidth=2, label='Win rate (last 100 games)')
-        
+            plt.plot(self.win_rate_episodes, self.win_rates,
+                    color='red', linewidth=2, label=f'Win rate (last {self.window} games)')
+
         plt.title('Wins per Episode')
         plt.xlabel('Episode')
         plt.ylabel('Wins')
         plt.legend()
-        
+
         # Plot losses
         plt.subplot(1, 3, 2)
-        plt.plot(self.losses)
+        plt.plot(self.episodes, self.losses)
         plt.title('Training Loss')
-        plt.xlabel('Batch')
+        plt.xlabel('Episode')
         plt.ylabel('Loss')
-        
+
         # Plot epsilon
         plt.subplot(1, 3, 3)
-        plt.plot(self.epsilons)
+        plt.plot(self.episodes, self.epsilons)
         plt.title('Exploration Rate (Epsilon)')
         plt.xlabel('Episode')
         plt.ylabel('Epsilon')
-        
+
         plt.tight_layout()
-        plt.show()
-    
+        if save_path:
+            fig.savefig(save_path)
+            plt.close(fig)
+            print(f"Training progress plot saved to {save_path}")
+        else:
+            plt.show()
+
     def get_stats(self):
         """Get training statistics"""
-        if len(self.wins) == 0:
+        if self.total_episodes == 0:
             return {}
-        
+
         stats = {
-            'total_episodes': len(self.wins),
-            'total_wins': sum(self.wins),
-            'win_rate': sum(self.wins) / len(self.wins),
-            'average_loss': np.mean(self.losses) if self.losses else 0,
+            'total_episodes': self.total_episodes,
+            'total_wins': self.total_wins,
+            'win_rate': self.total_wins / self.total_episodes,
+            'average_loss': self.total_loss / self.total_episodes,
             'current_epsilon': self.epsilons[-1] if self.epsilons else 1.0
         }
-        
+
         if len(self.win_rates) > 0:
             stats['recent_win_rate'] = self.win_rates[-1]
-        
+
         return stats
-    
+
     def print_stats(self):
         """Print training statistics"""
         stats = self.get_stats()
         print("\n=== Training Statistics ===")
         for key, value in stats.items():
-            print(f"{key.replace('_', ' ').title()}: {value:.3f}")
\ No newline at end of file
+            print(f"{key.replace('_', ' ').title()}: {value:.3f}")
+        if self.phase_times:
+            print("\n=== Time per Phase ===")
+            for name, phase in self.get_phase_stats().items():
+                print(f"{name.title()}: {phase['total_sec']:.3f}s over {phase['calls']} calls "
+                      f"({phase['avg_us']:.1f} us/call)")
\ No newline at end of file
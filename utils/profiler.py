@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import threading
+import functools
+
+# Opt-in instrumentation for the game, the AI and the training loops.
+# Instrumented code calls section(name) or is decorated with @profiled();
+# both reduce to a single global check while no Profiler is active.
+
+_active = None
+
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start', 'memory')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.track_allocations:
+            import tracemalloc
+            self.memory = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        allocated = 0
+        if self.profiler.track_allocations:
+            import tracemalloc
+            allocated = tracemalloc.get_traced_memory()[0] - self.memory
+        self.profiler._record(self.name, self.start, end, allocated)
+        return False
+
+
+class Profiler:
+    """Collects wall time, call counts and (optionally) allocations per section
+
+    track_allocations: measure net bytes allocated in each section with
+        tracemalloc (slows the run down noticeably)
+    trace: keep one event per section call for export_chrome_trace
+        (capped at max_trace_events)
+    trace_output: where report() writes the Chrome trace
+    backend: None, 'cprofile' or 'torch' to also run a cProfile or
+        torch.profiler session for the first backend_episodes episodes;
+        backend_output is the .prof / trace file it is saved to
+    """
+    def __init__(self, track_allocations=False, trace=False, max_trace_events=1000000,
+                 trace_output=None, backend=None, backend_episodes=10, backend_output=None):
+        if backend not in (None, 'cprofile', 'torch'):
+            raise ValueError(f"Unknown profiler backend: {backend}")
+        self.track_allocations = track_allocations
+        self.trace = trace or trace_output is not None
+        self.trace_output = trace_output
+        self.max_trace_events = max_trace_events
+        self.backend = backend
+        self.backend_episodes = backend_episodes
+        self.backend_output = backend_output
+
+        self.times = {}
+        self.counts = {}
+        self.allocations = {}
+        self.events = []
+        self.episodes = 0
+        self.peak_memory = 0
+        self._session = None
+        self._start_time = None
+        self._elapsed = 0.0
+        self._started_tracemalloc = False
+
+    def section(self, name):
+        return _Section(self, name)
+
+    def _record(self, name, start, end, allocated):
+        self.times[name] = self.times.get(name, 0.0) + end - start
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self.track_allocations:
+            self.allocations[name] = self.allocations.get(name, 0) + allocated
+        if self.trace and len(self.events) < self.max_trace_events:
+            self.events.append((name, start, end - start, threading.get_ident()))
+
+    def start(self):
+        """Make this the active profiler"""
+        global _active
+        if self.track_allocations:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+        self._start_time = time.perf_counter()
+        self._start_backend()
+        _active = self
+        return self
+
+    def stop(self):
+        global _active
+        if _active is self:
+            _active = None
+        self._stop_backend()
+        if self._start_time is not None:
+            self._elapsed += time.perf_counter() - self._start_time
+            self._start_time = None
+        if self.track_allocations:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def step(self):
+        """Mark the end of an episode; ends the backend session after backend_episodes"""
+        self.episodes += 1
+        if self._session is not None and self.episodes >= self.backend_episodes:
+            self._stop_backend()
+
+    def _start_backend(self):
+        if self.backend is None or self._session is not None or self.episodes >= self.backend_episodes:
+            return
+        if self.backend == 'cprofile':
+            import cProfile
+            self._session = cProfile.Profile()
+            self._session.enable()
+        else:
+            import torch.profiler
+            self._session = torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU])
+            self._session.__enter__()
+
+    def _stop_backend(self):
+        if self._session is None:
+            return
+        session, self._session = self._session, None
+        if self.backend == 'cprofile':
+            import pstats
+            session.disable()
+            if self.backend_output:
+                session.dump_stats(self.backend_output)
+            print(f"\n=== cProfile ({self.episodes} episodes) ===")
+            pstats.Stats(session).sort_stats('cumulative').print_stats(20)
+        else:
+            session.__exit__(None, None, None)
+            if self.backend_output:
+                session.export_chrome_trace(self.backend_output)
+            print(f"\n=== torch.profiler ({self.episodes} episodes) ===")
+            print(session.key_averages().table(sort_by="self_cpu_time_total", row_limit=20))
+
+    def summary(self):
+        """Per-section statistics, slowest first"""
+        rows = []
+        for name, total in sorted(self.times.items(), key=lambda item: -item[1]):
+            calls = self.counts[name]
+            row = {'name': name, 'calls': calls, 'total_sec': total, 'avg_us': total / calls * 1e6}
+            if self.track_allocations:
+                row['alloc_bytes'] = self.allocations.get(name, 0)
+            rows.append(row)
+        return rows
+
+    def print_summary(self):
+        elapsed = self._elapsed
+        if self._start_time is not None:
+            elapsed += time.perf_counter() - self._start_time
+        print("\n=== Profile Summary ===")
+        header = f"{'Section':<32}{'Calls':>10}{'Total (s)':>12}{'Avg (us)':>12}{'% Wall':>9}"
+        if self.track_allocations:
+            header += f"{'Alloc (KiB)':>14}"
+        print(header)
+        for row in self.summary():
+            share = row['total_sec'] / elapsed * 100 if elapsed > 0 else 0.0
+            line = (f"{row['name']:<32}{row['calls']:>10}{row['total_sec']:>12.4f}"
+                    f"{row['avg_us']:>12.1f}{share:>8.1f}%")
+            if self.track_allocations:
+                line += f"{row['alloc_bytes'] / 1024:>14.1f}"
+            print(line)
+        print(f"Wall time: {elapsed:.3f}s over {self.episodes} episodes")
+        if self.track_allocations and self.peak_memory:
+            print(f"Peak traced memory: {self.peak_memory / 1024:.1f} KiB")
+
+    def report(self):
+        """Print the summary and write the Chrome trace if trace_output is set"""
+        self.print_summary()
+        if self.trace_output:
+            self.export_chrome_trace(self.trace_output)
+
+    def export_chrome_trace(self, filepath):
+        """Write recorded sections as a Chrome trace (chrome://tracing, Perfetto)"""
+        origin = min(start for _, start, _, _ in self.events) if self.events else 0.0
+        pid = os.getpid()
+        events = [
+            {'name': name, 'ph': 'X', 'ts': (start - origin) * 1e6, 'dur': duration * 1e6,
+             'pid': pid, 'tid': tid}
+            for name, start, duration, tid in self.events
+        ]
+        with open(filepath, "w") as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        print(f"Chrome trace with {len(events)} events saved to {filepath}")
+
+
+def get_profiler():
+    """The active Profiler, or None"""
+    return _active
+
+
+def section(name):
+    """Context manager timing a block while a profiler is active"""
+    if _active is None:
+        return _NULL_SECTION
+    return _Section(_active, name)
+
+
+def step():
+    """Mark the end of a training episode"""
+    if _active is not None:
+        _active.step()
+
+
+def profiled(name=None):
+    """Decorator timing every call of a function while a profiler is active"""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _Section(_active, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,248 @@
+import sys
+import os
+import io
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import itertools
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from termcolor import cprint
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings a sweep may vary: passed to train_ai for the first rung, then
+# TRAINING_PARAMS go to continue_training when a trial is resumed
+SWEEP_PARAMS = ('learning_rate', 'epsilon_start', 'epsilon_min', 'epsilon_decay', 'gamma',
+                'memory_size', 'batch_size', 'replay_every')
+TRAINING_PARAMS = ('batch_size', 'replay_every')
+
+DEFAULT_SPACE = {
+    'learning_rate': ('log_uniform', 1e-4, 3e-3),
+    'epsilon_decay': ('choice', [0.995, 0.998, 0.999]),
+    'epsilon_min': ('choice', [0.05, 0.1, 0.3]),
+    'gamma': ('choice', [0.9, 0.95, 0.99]),
+    'memory_size': ('choice', [2000, 5000, 10000]),
+    'batch_size': ('choice', [16, 32, 64]),
+    'replay_every': ('choice', [1, 2, 4])
+}
+
+
+def _check_space(space):
+    unknown = [name for name in space if name not in SWEEP_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(unknown)} (choose from {', '.join(SWEEP_PARAMS)})")
+
+
+def grid_values(spec, grid_points=3):
+    """Values a grid search tries for one parameter
+
+    Lists and ('choice', [...]) are taken as they are; ('uniform', lo, hi) and
+    ('log_uniform', lo, hi) become grid_points evenly (or log-evenly) spaced
+    values from lo to hi.
+    """
+    if isinstance(spec, list):
+        return spec
+    kind = spec[0] if isinstance(spec, tuple) and spec else spec
+    if kind == 'choice':
+        return list(spec[1])
+    if kind in ('uniform', 'log_uniform'):
+        if grid_points < 1:
+            raise ValueError("grid_points must be at least 1")
+        low, high = spec[1], spec[2]
+        if grid_points == 1:
+            return [low]
+        if kind == 'log_uniform':
+            low, high = math.log(low), math.log(high)
+        values = [low + (high - low) * i / (grid_points - 1) for i in range(grid_points)]
+        if kind == 'log_uniform':
+            values = [math.exp(value) for value in values]
+        return [spec[1]] + values[1:-1] + [spec[2]]  # Exact endpoints
+    raise ValueError(f"Grid search cannot handle {spec!r}: use a list of values, ('choice', [...]), "
+                     f"('uniform', lo, hi) or ('log_uniform', lo, hi)")
+
+
+def grid_trials(space, grid_points=3):
+    """Every combination of the space's values, continuous ranges cut into grid_points values"""
+    _check_space(space)
+    names = list(space)
+    values = [grid_values(spec, grid_points) for spec in space.values()]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def sample_value(spec, rng):
+    """Draw one value from a list, ('choice', [...]), ('uniform', lo, hi) or ('log_uniform', lo, hi)"""
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    kind = spec[0]
+    if kind == 'choice':
+        return rng.choice(spec[1])
+    if kind == 'uniform':
+        return rng.uniform(spec[1], spec[2])
+    if kind == 'log_uniform':
+        return math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2])))
+    raise ValueError(f"Unknown distribution: {kind}")
+
+
+def random_trials(space, num_trials, seed=0):
+    _check_space(space)
+    rng = random.Random(seed)
+    return [{name: sample_value(spec, rng) for name, spec in space.items()} for _ in range(num_trials)]
+
+
+def _init_worker(num_threads):
+    import torch
+    torch.set_num_threads(num_threads)
+
+
+def _run_trial(trial_id, params, episodes, checkpoint_path, opponent, eval_games, seed, resume=False):
+    """Train one trial for `episodes` episodes, or with `resume` that many more
+    from its checkpoint, and score it"""
+    import numpy as np
+    import torch
+    from core.neural_network import TicTacToeAI
+    from core.training import train_ai, continue_training
+    from utils.evaluation import evaluate
+
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    start = time.perf_counter()
+    # Keep the per-episode training log out of the sweep output
+    with contextlib.redirect_stdout(io.StringIO()):
+        if resume:
+            ai = TicTacToeAI(learning_rate=params.get('learning_rate', 0.0001),
+                             memory_size=params.get('memory_size', 2000))
+            ai.load_model(checkpoint_path)
+            training_params = {name: params[name] for name in TRAINING_PARAMS if name in params}
+            ai, monitor = continue_training(ai, episodes, **training_params)
+            ai.save_model(checkpoint_path)
+        else:
+            ai, monitor = train_ai(episodes=episodes, save_path=checkpoint_path, **params)
+        train_time = time.perf_counter() - start
+        results, _ = evaluate(ai, [opponent], eval_games, epsilon=0.0)
+
+    # Score: points per game (win 1, draw 0.5) averaged over both sides
+    score = sum((r['wins'] + 0.5 * r['draws']) / r['games'] for r in results) / len(results)
+    return {
+        'trial': trial_id,
+        'score': score,
+        'loss_rate': sum(r['loss_rate'] for r in results) / len(results),
+        'train_time': train_time,
+        'training_steps': ai.training_steps,
+        'epsilon': ai.epsilon
+    }
+
+
+def successive_halving(trials, output_dir="sweep", min_episodes=200, max_episodes=1600, eta=2,
+                       opponent="solver", eval_games=200, num_workers=None, threads_per_worker=1,
+                       seed=0):
+    """Train all trials for min_episodes, keep the best 1/eta, train the survivors
+    eta times longer, and repeat until max_episodes
+
+    Every trial resumes from its own checkpoint in output_dir; trial
+    checkpoints left there by an earlier sweep are deleted first. Returns the
+    ranked results (best first); the best checkpoint is copied to
+    output_dir/best.pth and the table is written to output_dir/results.json.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for name in os.listdir(output_dir):
+        if name.startswith("trial_") and name.endswith(".pth"):
+            os.remove(os.path.join(output_dir, name))
+    num_workers = num_workers or max(1, (os.cpu_count() or 2) // threads_per_worker)
+    records = {i: {'trial': i, 'params': params, 'episodes': 0, 'rung': -1, 'score': None}
+               for i, params in enumerate(trials)}
+    alive = list(records)
+    budget = min_episodes
+    rung = 0
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(threads_per_worker,)) as pool:
+        while alive:
+            cprint(f"Rung {rung}: {len(alive)} trials to {budget} episodes", "cyan", attrs=['bold'])
+            jobs = {
+                pool.submit(_run_trial, i, records[i]['params'], budget - records[i]['episodes'],
+                            os.path.join(output_dir, f"trial_{i}.pth"), opponent, eval_games,
+                            seed * 100003 + i * 101 + rung, records[i]['episodes'] > 0): i
+                for i in alive
+            }
+            for job, i in jobs.items():
+                result = job.result()
+                records[i].update(result, episodes=budget, rung=rung)
+                cprint(f"  trial {i:>3}  score {result['score']:.3f}  ({result['train_time']:.1f}s)", "yellow")
+
+            if budget >= max_episodes or len(alive) == 1:
+                break
+            alive.sort(key=lambda i: records[i]['score'], reverse=True)
+            alive = alive[:max(1, len(alive) // eta)]
+            budget = min(budget * eta, max_episodes)
+            rung += 1
+
+    # Trials that went further rank above trials pruned earlier
+    ranked = sorted(records.values(), key=lambda r: (r['rung'], r['score']), reverse=True)
+    best = ranked[0]
+    shutil.copyfile(os.path.join(output_dir, f"trial_{best['trial']}.pth"), os.path.join(output_dir, "best.pth"))
+    with open(os.path.join(output_dir, "results.json"), "w") as f:
+        json.dump(ranked, f, indent=2)
+    return ranked
+
+
+def _format_value(value):
+    return f"{value:.4g}" if isinstance(value, float) else str(value)
+
+
+def print_ranking(ranked, top=20):
+    cprint("=== Sweep Results ===", "cyan", attrs=['bold'])
+    names = [name for name in SWEEP_PARAMS if any(name in r['params'] for r in ranked)]
+    cprint(f"{'Rank':<6}{'Trial':<7}{'Episodes':>9}{'Score':>8}  " + "".join(f"{name:>15}" for name in names),
+           "white", attrs=['bold'])
+    for rank, r in enumerate(ranked[:top], 1):
+        values = "".join(f"{_format_value(r['params'].get(name, '-')):>15}" for name in names)
+        color = "green" if rank == 1 else "white"
+        cprint(f"{rank:<6}{r['trial']:<7}{r['episodes']:>9}{r['score']:>8.3f}  {values}", color)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep with successive halving")
+    parser.add_argument("--space", help="JSON file mapping parameters to a list of values or "
+                                        "[\"uniform\"|\"log_uniform\", lo, hi] / [\"choice\", [...]]")
+    parser.add_argument("--search", choices=["random", "grid"], default="random")
+    parser.add_argument("--trials", type=int, default=16, help="number of random trials")
+    parser.add_argument("--grid-points", type=int, default=3,
+                        help="values per uniform / log_uniform range in a grid search")
+    parser.add_argument("--min-episodes", type=int, default=200)
+    parser.add_argument("--max-episodes", type=int, default=1600)
+    parser.add_argument("--eta", type=int, default=2, help="keep 1/eta of the trials at each rung")
+    parser.add_argument("--opponent", default="solver", help="fixed evaluation opponent")
+    parser.add_argument("--eval-games", type=int, default=200, help="games per side at each rung")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per worker")
+    parser.add_argument("--output", default="sweep")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = {name: tuple(spec) if spec and isinstance(spec[0], str) else spec
+                     for name, spec in json.load(f).items()}
+    if args.search == "grid":
+        trials = grid_trials(space, args.grid_points)
+    else:
+        trials = random_trials(space, args.trials, args.seed)
+
+    start = time.perf_counter()
+    ranked = successive_halving(trials, args.output, args.min_episodes, args.max_episodes, args.eta,
+                                args.opponent, args.eval_games, args.workers, args.threads, args.seed)
+    print_ranking(ranked)
+    cprint(f"Best checkpoint: {os.path.join(args.output, 'best.pth')} "
+           f"({time.perf_counter() - start:.0f}s total)", "magenta")
+
+
+if __name__ == "__main__":
+    main()